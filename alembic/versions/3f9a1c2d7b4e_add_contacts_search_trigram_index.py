@@ -0,0 +1,33 @@
+"""add contacts search trigram index
+
+Revision ID: 3f9a1c2d7b4e
+Revises: 
+Create Date: 2026-10-15 10:12:31.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2d7b4e'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A fresh database gets the whole schema from Base.metadata.create_all
+    if not sa.inspect(op.get_bind()).has_table("contacts"):
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS contacts_search_trgm ON contacts USING gin "
+        "((first_name || ' ' || last_name || ' ' || email) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS contacts_search_trgm")
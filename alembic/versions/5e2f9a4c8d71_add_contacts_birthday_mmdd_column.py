@@ -0,0 +1,48 @@
+"""add contacts birthday_mmdd column
+
+Revision ID: 5e2f9a4c8d71
+Revises: b71d5e0c3a62
+Create Date: 2026-10-15 14:41:08.730215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2f9a4c8d71'
+down_revision: Union[str, None] = 'b71d5e0c3a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("contacts") or any(
+        column["name"] == "birthday_mmdd" for column in inspector.get_columns("contacts")
+    ):
+        return
+    op.add_column(
+        'contacts',
+        sa.Column(
+            'birthday_mmdd',
+            sa.SmallInteger(),
+            sa.Computed(
+                "EXTRACT(month FROM birthday) * 100 + EXTRACT(day FROM birthday)",
+                persisted=True,
+            ),
+        ),
+    )
+    op.create_index(op.f('ix_contacts_birthday_mmdd'), 'contacts', ['birthday_mmdd'])
+    op.execute("DROP INDEX IF EXISTS contacts_bday_doy")
+
+
+def downgrade() -> None:
+    op.execute(
+        "CREATE INDEX contacts_bday_doy ON contacts "
+        "((EXTRACT(month FROM birthday) * 100 + EXTRACT(day FROM birthday)))"
+    )
+    op.drop_index(op.f('ix_contacts_birthday_mmdd'), table_name='contacts')
+    op.drop_column('contacts', 'birthday_mmdd')
@@ -0,0 +1,35 @@
+"""add contacts birthday month-day index
+
+Revision ID: 8c4e2b7a9d13
+Revises: 3f9a1c2d7b4e
+Create Date: 2026-10-15 10:47:05.219377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4e2b7a9d13'
+down_revision: Union[str, None] = '3f9a1c2d7b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    # Tables created at head already have the birthday_mmdd column instead
+    if not inspector.has_table("contacts") or any(
+        column["name"] == "birthday_mmdd" for column in inspector.get_columns("contacts")
+    ):
+        return
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS contacts_bday_doy ON contacts "
+        "((EXTRACT(month FROM birthday) * 100 + EXTRACT(day FROM birthday)))"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS contacts_bday_doy")
@@ -0,0 +1,34 @@
+"""scope contact email uniqueness to user
+
+Revision ID: 9a3d6f1e2c85
+Revises: 5e2f9a4c8d71
+Create Date: 2026-10-15 15:20:44.918302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3d6f1e2c85'
+down_revision: Union[str, None] = '5e2f9a4c8d71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("contacts") or any(
+        constraint["name"] == "uq_contacts_user_email"
+        for constraint in inspector.get_unique_constraints("contacts")
+    ):
+        return
+    op.drop_index('ix_contacts_email', table_name='contacts', if_exists=True)
+    op.create_unique_constraint('uq_contacts_user_email', 'contacts', ['user_id', 'email'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_contacts_user_email', 'contacts', type_='unique')
+    op.create_index('ix_contacts_email', 'contacts', ['email'], unique=True)
@@ -0,0 +1,37 @@
+"""coalesce contacts search trigram index
+
+Revision ID: b71d5e0c3a62
+Revises: 8c4e2b7a9d13
+Create Date: 2026-10-15 14:03:57.219604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71d5e0c3a62'
+down_revision: Union[str, None] = '8c4e2b7a9d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("contacts"):
+        return
+    op.execute("DROP INDEX IF EXISTS contacts_search_trgm")
+    op.execute(
+        "CREATE INDEX contacts_search_trgm ON contacts USING gin "
+        "((coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' "
+        "|| coalesce(email, '')) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS contacts_search_trgm")
+    op.execute(
+        "CREATE INDEX contacts_search_trgm ON contacts USING gin "
+        "((first_name || ' ' || last_name || ' ' || email) gin_trgm_ops)"
+    )
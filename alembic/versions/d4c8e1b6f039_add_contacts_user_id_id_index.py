@@ -0,0 +1,28 @@
+"""add contacts user_id id index
+
+Revision ID: d4c8e1b6f039
+Revises: 9a3d6f1e2c85
+Create Date: 2026-10-15 16:02:19.304871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4c8e1b6f039'
+down_revision: Union[str, None] = '9a3d6f1e2c85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("contacts"):
+        return
+    op.create_index('ix_contacts_user_id_id', 'contacts', ['user_id', 'id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_id', table_name='contacts')
@@ -5,33 +5,62 @@ This module includes functions for token generation, password management,
 user verification, and Cloudinary integration.
 """
 
-import smtplib
+import jwt
+import time
+import bcrypt
 import cloudinary 
 import cloudinary.uploader
 
+from cachetools import TTLCache
 from decouple import config
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from fastapi import Depends, HTTPException, UploadFile
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
-from jose import jwt, JWTError
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from threading import Lock
+from typing import Optional
 
 from database import get_db
+from jwt_base64 import install_fast_base64
+from jwt_hmac import HASH_ALGORITHMS, register_precomputed_hmac
 from models import User
-
-# Password context confifuration
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from smtp_pool import get_smtp
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login/")
 
 SECRET_KEY = config("SECRET_KEY")
-ALGORITHM = config("ALGORITHM")
+# Only symmetric HMAC algorithms are accepted: HS256 is the default and the
+# cheapest to verify, and pinning the family rules out algorithm confusion
+ALGORITHM = config("ALGORITHM", default="HS256")
+if ALGORITHM not in HASH_ALGORITHMS:
+    raise RuntimeError(
+        f"Unsupported ALGORITHM {ALGORITHM!r}, expected one of {', '.join(HASH_ALGORITHMS)}"
+    )
 ACCESS_TOKEN_EXPIRE_MINUTES = config("ACCESS_TOKEN_EXPIRE_MINUTES", cast=int)
 REFRESH_TOKEN_EXPIRE_DAYS = config("REFRESH_TOKEN_EXPIRE_DAYS", cast=int)
 
+# Signing key and algorithm list are built once instead of on every token
+_SECRET = SECRET_KEY.encode("utf-8")
+_ALGS = [ALGORITHM]
+register_precomputed_hmac(ALGORITHM, _SECRET)
+install_fast_base64()
+
+# Token lifetimes in seconds, added to an integer epoch timestamp
+_ACCESS_TTL = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+_REFRESH_TTL = REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+# Decoded payloads keyed by raw token, and user ids keyed by email
+_token_cache = TTLCache(maxsize=10000, ttl=60)
+_user_id_cache = TTLCache(maxsize=10000, ttl=30)
+_cache_lock = Lock()
+
+# Bcrypt work factor, hashing goes straight through the native bcrypt bindings
+# Each round doubles the cost. Password guessing is bounded by the default rate
+# limit on /login, which main.rate_limit_key always counts per client address
+BCRYPT_ROUNDS = config("BCRYPT_ROUNDS", default=11, cast=int)
+
 SMTP_EMAIL = config("SMTP_EMAIL")
 SMTP_PASSWORD = config("SMTP_PASSWORD")
 
@@ -52,21 +81,30 @@ def hash_password(password: str) -> str:
     Returns:
         str: The hashed password.
     """
-    return pwd_context.hash(password)
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+# Checked against when the user does not exist, so both cases take as long
+_DUMMY_HASH = hash_password("").encode("utf-8")
+
+
+def verify_password(plain_password: str, hashed_password: Optional[str]) -> bool:
     """
     Verifies if a plaintext password matches its hashed version.
     
     Args:
         plain_password (str): The plaintext password.
-        hashed_password (str): The hashed password.
+        hashed_password (Optional[str]): The hashed password, or None for an unknown user.
         
     Returns:
         bool: True if the passwords match, False otherwise.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    if hashed_password is None:
+        bcrypt.checkpw(plain_password.encode("utf-8"), _DUMMY_HASH)
+        return False
+    return bcrypt.checkpw(plain_password.encode("utf-8"),
+                          hashed_password.encode("utf-8"))
 
 
 def create_access_token(data: dict) -> str:
@@ -80,8 +118,8 @@ def create_access_token(data: dict) -> str:
         str: The generated access token.
     """
     to_encode = data.copy()
-    to_encode.update({"exp": datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode["exp"] = int(time.time()) + _ACCESS_TTL
+    return jwt.encode(to_encode, _SECRET, algorithm=ALGORITHM)
 
 
 def create_refresh_token(data: dict) -> str:
@@ -95,8 +133,8 @@ def create_refresh_token(data: dict) -> str:
         str: The generated refresh token.
     """
     to_encode = data.copy()
-    to_encode.update({"exp": datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode["exp"] = int(time.time()) + _REFRESH_TTL
+    return jwt.encode(to_encode, _SECRET, algorithm=ALGORITHM)
 
 
 def verify_token(token: str) -> dict:
@@ -112,21 +150,38 @@ def verify_token(token: str) -> dict:
     Raises:
         HTTPException: If the token is invalid.
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    with _cache_lock:
+        payload = _token_cache.get(token)
+    if payload is not None and payload.get("exp", 0) > time.time():
         return payload
-    except JWTError:
+    try:
+        payload = jwt.decode(token, _SECRET, algorithms=_ALGS)
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    with _cache_lock:
+        _token_cache[token] = payload
+    return payload
+
+
+def invalidate_user_cache(email: str):
+    """
+    Drops the cached user id for the given email.
+    
+    Args:
+        email (str): The email address of the user.
+    """
+    with _cache_lock:
+        _user_id_cache.pop(email, None)
     
 
-def get_current_user(token: str = Depends(oauth2_scheme),
-                     db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme),
+                           db: AsyncSession = Depends(get_db)):
     """
     Retrieves the currently authenticated user.
     
     Args:
         token (str): The JWT token provided by the client.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         
     Returns:
         User: The user object.
@@ -138,27 +193,36 @@ def get_current_user(token: str = Depends(oauth2_scheme),
     email = payload.get("sub")
     if not email:
         raise HTTPException(status_code=401, detail="Invalid token")
-    user = db.query(User).filter(User.email == email).first()
+    with _cache_lock:
+        user_id = _user_id_cache.get(email)
+    if user_id is not None:
+        user = await db.get(User, user_id)
+    else:
+        result = await db.execute(
+            select(User).where(User.email == email)
+            )
+        user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
+    with _cache_lock:
+        _user_id_cache[email] = user.id
     if not user.is_verified:
         raise HTTPException(status_code=403, detail="Email not verified")
     return user
 
 
-def send_verification_email(email: str, token: str):
+def build_verification_email(email: str, token: str) -> MIMEMultipart:
     """
-    Sends an email verificaion message.
+    Builds an email verification message.
     
     Args:
         email (str): The recipient's email address.
         token (str): The verification token.
         
-    Raises:
-        smtplib.SMTPException: If there is an issue sending the email.
+    Returns:
+        MIMEMultipart: The message ready to be sent.
     """
     sender_email = config("SMTP_EMAIL")
-    sender_password = config("SMTP_PASSWORD")
     subject = "Verify your email"
     verification_link = f"http://localhost:8000/verify-email?token={token}"
 
@@ -169,8 +233,21 @@ def send_verification_email(email: str, token: str):
 
     body = f"Click the link to verify your email: {verification_link}"
     message.attach(MIMEText(body, "plain"))
+    return message
+
+
+def send_verification_email(email: str, token: str):
+    """
+    Sends an email verificaion message.
+    
+    Args:
+        email (str): The recipient's email address.
+        token (str): The verification token.
+        
+    Raises:
+        smtplib.SMTPException: If there is an issue sending the email.
+    """
+    message = build_verification_email(email, token)
 
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.sendmail(sender_email, email, message.as_string())
+    with get_smtp() as server:
+        server.sendmail(message["From"], email, message.as_string())
@@ -1,33 +1,55 @@
+import asyncio
+
 from decouple import config
-from sqlalchemy import create_engine
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 
 
 SQLALCHEMY_DATABASE_URL = config("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+DB_POOL_SIZE = config("DB_POOL_SIZE", default=20, cast=int)
+DB_MAX_OVERFLOW = config("DB_MAX_OVERFLOW", default=30, cast=int)
+DB_POOL_TIMEOUT = config("DB_POOL_TIMEOUT", default=10, cast=int)
+DB_POOL_RECYCLE = config("DB_POOL_RECYCLE", default=1800, cast=int)
+
+engine_options = {"echo": False}
+if make_url(SQLALCHEMY_DATABASE_URL).get_backend_name() == "postgresql":
+    # Pool tuning and disabling JIT only apply to the PostgreSQL server
+    engine_options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args={"server_settings": {"jit": "off"}},
+    )
+
+# DATABASE_URL must name an async driver, e.g. postgresql+asyncpg://
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL, **engine_options)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
+async def get_db():
     """
     Provides a datavase session for use in application requests.
     
-    This function creates a new database session using the "SessionLocal' factory
-    and ensures that the session is properly closed after use.
+    This function creates a new async database session using the "SessionLocal' factory
+    and ensures that the session is properly closed after use. Closing expunges every
+    loaded object and returns the connection to the pool; it is shielded so a request
+    cancelled by a client disconnect cannot leave the connection checked out.
     
     Yields:
-        Session: A SQLAlchmy session object for interactiong with the database.
+        AsyncSession: A SQLAlchmy session object for interactiong with the database.
         
     Example:
-        with get_db() as db:
-            db.query(...)
+        async for db in get_db():
+            await db.execute(...)
     """
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await asyncio.shield(db.close())
@@ -0,0 +1,60 @@
+"""
+Module for decoding JWT segments with the SIMD base64 codec from pybase64.
+
+PyJWT base64url-decodes the header, payload and signature of every token
+with the scalar codec from the standard library. When pybase64 is
+installed, install_fast_base64() points PyJWT at its vectorized
+implementation instead.
+"""
+
+import jwt.api_jws
+
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+
+def base64url_decode(input) -> bytes:
+    """
+    Decodes unpadded base64url data.
+
+    Args:
+        input (bytes | str): The encoded data.
+        
+    Returns:
+        bytes: The decoded data.
+    """
+    if isinstance(input, str):
+        input = input.encode("utf-8")
+    rem = len(input) % 4
+    if rem > 0:
+        input += b"=" * (4 - rem)
+    return pybase64.urlsafe_b64decode(input)
+
+
+def base64url_encode(input: bytes) -> bytes:
+    """
+    Encodes data as unpadded base64url.
+
+    Args:
+        input (bytes): The data to encode.
+        
+    Returns:
+        bytes: The encoded data.
+    """
+    return pybase64.urlsafe_b64encode(input).rstrip(b"=")
+
+
+def install_fast_base64() -> bool:
+    """
+    Makes PyJWT use pybase64 for token segments if it is available.
+
+    Returns:
+        bool: True if pybase64 was installed into PyJWT.
+    """
+    if pybase64 is None:
+        return False
+    jwt.api_jws.base64url_decode = base64url_decode
+    jwt.api_jws.base64url_encode = base64url_encode
+    return True
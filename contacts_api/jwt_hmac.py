@@ -0,0 +1,64 @@
+"""
+Module for signing JWTs with a precomputed HMAC state.
+
+PyJWT validates the key and re-runs the HMAC key schedule on every token.
+With a single static secret both can be done once: the validated key is
+kept and each signature starts from a copy of the keyed HMAC object.
+"""
+
+import hmac
+import jwt
+
+from jwt.algorithms import HMACAlgorithm
+
+
+HASH_ALGORITHMS = {
+    "HS256": HMACAlgorithm.SHA256,
+    "HS384": HMACAlgorithm.SHA384,
+    "HS512": HMACAlgorithm.SHA512,
+}
+
+
+class PrecomputedHMACAlgorithm(HMACAlgorithm):
+    """
+    HMAC algorithm that reuses the keyed state for one known secret.
+
+    Keys other than the configured secret go through the regular PyJWT path.
+
+    Attributes:
+        secret (bytes): The validated signing secret.
+    """
+
+    def __init__(self, hash_alg, secret: bytes):
+        super().__init__(hash_alg)
+        self.secret = super().prepare_key(secret)
+        # Naming the digest keeps hmac on OpenSSL's HMAC (SHA-NI where available)
+        self._prototype = hmac.new(self.secret, digestmod=hash_alg().name)
+
+    def prepare_key(self, key):
+        if key is self.secret or key == self.secret:
+            return self.secret
+        return super().prepare_key(key)
+
+    def sign(self, msg: bytes, key) -> bytes:
+        if key is not self.secret:
+            return super().sign(msg, key)
+        mac = self._prototype.copy()
+        mac.update(msg)
+        return mac.digest()
+
+    def verify(self, msg: bytes, key, sig: bytes) -> bool:
+        return hmac.compare_digest(sig, self.sign(msg, key))
+
+
+def register_precomputed_hmac(algorithm: str, secret: bytes):
+    """
+    Replaces PyJWT's HMAC implementation for the given algorithm.
+
+    Args:
+        algorithm (str): The JWT algorithm name, one of HS256, HS384 or HS512.
+        secret (bytes): The signing secret.
+    """
+    hash_alg = HASH_ALGORITHMS[algorithm]
+    jwt.unregister_algorithm(algorithm)
+    jwt.register_algorithm(algorithm, PrecomputedHMACAlgorithm(hash_alg, secret))
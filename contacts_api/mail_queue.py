@@ -0,0 +1,212 @@
+"""
+Module for batching outgoing verification emails.
+
+Registrations put emails on an in-memory queue. A single background task
+drains the queue periodically and sends each batch over one pooled SMTP
+connection, pipelining commands when the server supports it. Emails that
+could not be sent are retried with later batches and dropped after
+MAIL_MAX_ATTEMPTS tries. Emails still queued at shutdown are flushed before
+the application exits.
+"""
+
+import asyncio
+import logging
+import smtplib
+
+from decouple import config
+
+from auth import build_verification_email
+from smtp_pool import get_smtp
+
+
+MAIL_BATCH_SIZE = config("MAIL_BATCH_SIZE", default=50, cast=int)
+MAIL_FLUSH_INTERVAL = config("MAIL_FLUSH_INTERVAL", default=1.0, cast=float)
+MAIL_MAX_ATTEMPTS = config("MAIL_MAX_ATTEMPTS", default=5, cast=int)
+MAIL_QUEUE_SIZE = config("MAIL_QUEUE_SIZE", default=10000, cast=int)
+
+logger = logging.getLogger(__name__)
+
+# Pending (email, token, attempts) items waiting to be sent
+verification_queue = asyncio.Queue(maxsize=MAIL_QUEUE_SIZE)
+
+
+def _put(item: tuple):
+    """
+    Puts an item on the verification queue, dropping it if the queue is full.
+
+    Args:
+        item (tuple): The (email, token, attempts) item to queue.
+    """
+    try:
+        verification_queue.put_nowait(item)
+    except asyncio.QueueFull:
+        logger.error("Verification queue full, dropping email to %s", item[0])
+
+
+def _requeue(items: list):
+    """
+    Queues failed items for another attempt or drops them after MAIL_MAX_ATTEMPTS.
+
+    Args:
+        items (list): The (email, token, attempts) items that were not sent.
+    """
+    for email, token, attempts in items:
+        attempts += 1
+        if attempts >= MAIL_MAX_ATTEMPTS:
+            logger.error("Dropping verification email to %s after %d attempts",
+                         email, attempts)
+        else:
+            _put((email, token, attempts))
+
+
+def enqueue_verification_email(email: str, token: str):
+    """
+    Schedules a verification email to be sent with the next batch.
+
+    Args:
+        email (str): The recipient's email address.
+        token (str): The verification token.
+    """
+    _put((email, token, 0))
+
+
+def _pipelined_sendmail(server: smtplib.SMTP, sender: str, recipient: str, msg: str):
+    """
+    Sends one message with MAIL, RCPT and DATA pipelined (RFC 2920).
+
+    Args:
+        server (smtplib.SMTP): A connection advertising PIPELINING.
+        sender (str): The envelope sender.
+        recipient (str): The envelope recipient.
+        msg (str): The message to send.
+
+    Raises:
+        smtplib.SMTPResponseException: If the server rejects the message.
+    """
+    server.send(f"MAIL FROM:<{sender}>\r\nRCPT TO:<{recipient}>\r\nDATA\r\n")
+    replies = [server.getreply() for _ in range(3)]
+    (mail_code, mail_resp), (rcpt_code, rcpt_resp), (data_code, data_resp) = replies
+    if mail_code != 250 or rcpt_code not in (250, 251) or data_code != 354:
+        if data_code == 354:
+            server.send(".\r\n")
+            server.getreply()
+        server.rset()
+        code, resp = next(
+            (c, r) for c, r in replies if c not in (250, 251, 354)
+        )
+        raise smtplib.SMTPResponseException(code, resp)
+
+    data = smtplib.quotedata(msg)
+    if not data.endswith("\r\n"):
+        data += "\r\n"
+    server.send(data + ".\r\n")
+    code, resp = server.getreply()
+    if code != 250:
+        raise smtplib.SMTPResponseException(code, resp)
+
+
+def send_verification_batch(batch: list) -> list:
+    """
+    Sends a batch of verification emails over a single SMTP connection.
+
+    Failed messages are logged and dropped. The batch is aborted once more
+    than a third of it has failed, and the unsent rest is returned.
+
+    Args:
+        batch (list): The (email, token) pairs to send.
+
+    Returns:
+        list: The pairs left unsent because the batch was aborted.
+    """
+    max_failures = len(batch) // 3
+    failures = 0
+    with get_smtp() as server:
+        pipelining = server.has_extn("pipelining")
+        for index, (email, token) in enumerate(batch):
+            message = build_verification_email(email, token)
+            try:
+                if pipelining:
+                    _pipelined_sendmail(server, message["From"], email,
+                                        message.as_string())
+                else:
+                    server.sendmail(message["From"], email, message.as_string())
+            except smtplib.SMTPServerDisconnected:
+                logger.warning("SMTP connection lost, requeueing %d emails",
+                               len(batch) - index)
+                return batch[index:]
+            except smtplib.SMTPException:
+                logger.exception("Failed to send verification email to %s", email)
+                failures += 1
+                if failures > max_failures:
+                    logger.warning("Aborting batch after %d failures", failures)
+                    return batch[index + 1:]
+    return []
+
+
+async def run_verification_mailer():
+    """
+    Drains the verification queue in batches until cancelled.
+    """
+    while True:
+        item = await verification_queue.get()
+        try:
+            await asyncio.sleep(MAIL_FLUSH_INTERVAL)
+        except asyncio.CancelledError:
+            # Leave the email for stop_verification_mailer to flush
+            _put(item)
+            raise
+        batch = [item]
+        while len(batch) < MAIL_BATCH_SIZE and not verification_queue.empty():
+            batch.append(verification_queue.get_nowait())
+        pairs = [(email, token) for email, token, _ in batch]
+        try:
+            unsent = await asyncio.to_thread(send_verification_batch, pairs)
+        except (smtplib.SMTPException, OSError):
+            logger.exception("Failed to send verification batch")
+            unsent = pairs
+        # The unsent pairs are always the tail of the batch
+        _requeue(batch[len(batch) - len(unsent):])
+
+
+def start_verification_mailer() -> asyncio.Task:
+    """
+    Starts the background task that sends queued verification emails.
+
+    The queue is recreated on the running event loop, keeping any emails
+    enqueued before startup.
+
+    Returns:
+        asyncio.Task: The running mailer task.
+    """
+    global verification_queue
+    pending, verification_queue = verification_queue, asyncio.Queue(maxsize=MAIL_QUEUE_SIZE)
+    while not pending.empty():
+        verification_queue.put_nowait(pending.get_nowait())
+    return asyncio.create_task(run_verification_mailer())
+
+
+async def stop_verification_mailer(mailer: asyncio.Task):
+    """
+    Stops the mailer task and sends the emails still waiting in the queue.
+
+    Args:
+        mailer (asyncio.Task): The task returned by start_verification_mailer.
+    """
+    mailer.cancel()
+    try:
+        await mailer
+    except asyncio.CancelledError:
+        pass
+    batch = []
+    while not verification_queue.empty():
+        email, token, _ = verification_queue.get_nowait()
+        batch.append((email, token))
+    if not batch:
+        return
+    try:
+        unsent = await asyncio.to_thread(send_verification_batch, batch)
+    except (smtplib.SMTPException, OSError):
+        logger.exception("Failed to flush verification emails")
+        unsent = batch
+    if unsent:
+        logger.error("Dropping %d unsent verification emails on shutdown", len(unsent))
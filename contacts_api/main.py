@@ -1,27 +1,128 @@
+import asyncio
+import os
+import anyio.to_thread
 import cloudinary
+import cloudinary.uploader
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from decouple import config
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from fastapi import FastAPI, Depends, HTTPException, Query, Request, File, UploadFile
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, File, UploadFile
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from functools import partial
-from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
+from sqlalchemy import func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from auth import hash_password, verify_password, create_access_token, create_refresh_token, get_current_user, send_verification_email, verify_token
+from auth import hash_password, verify_password, create_access_token, create_refresh_token, get_current_user, verify_token, invalidate_user_cache
 from database import engine, get_db
+from mail_queue import enqueue_verification_email, start_verification_mailer, stop_verification_mailer
 from models import Base, Contact, User
+from response_cache import close_response_cache, get_cached, invalidate, set_cached
 from schemas import ContactCreate, UserCreate, UserResponse, Token
 from schemas import Contact as ContactResponse
-Base.metadata.create_all(bind=engine)
 
-limiter = Limiter(key_func=partial(lambda request: get_current_user().id), default_limits=["5/minute"])
-app = FastAPI()
+# Maximum number of contacts returned by a single search
+SEARCH_RESULTS_LIMIT = 100
+
+# Upper bound for the page size requested from read_contacts
+MAX_PAGE_SIZE = 500
+
+# Rows fetched per round trip when streaming upcoming birthdays
+BIRTHDAYS_FETCH_SIZE = 500
+
+# The birthday window only moves at midnight, so its cached response lives longer
+BIRTHDAYS_CACHE_TTL = config("BIRTHDAYS_CACHE_TTL", default=3600, cast=int)
+
+# Serializes contact lists straight to the JSON bytes that are cached
+contact_list_adapter = TypeAdapter(List[ContactResponse])
+
+# Avatars are sent to Cloudinary in chunks of this many bytes
+AVATAR_CHUNK_SIZE = 6_000_000
+
+# Avatars smaller than this are sent in a single upload request
+AVATAR_SINGLE_UPLOAD_MAX_SIZE = 99_000
+
+# Shared rate limit counters, e.g. redis://redis:6379/0 for multi-worker deployments
+RATE_LIMIT_STORAGE_URI = config("RATE_LIMIT_STORAGE_URI", default="memory://")
+RATE_LIMIT_MAX_CONNECTIONS = config("RATE_LIMIT_MAX_CONNECTIONS", default=50, cast=int)
+# moving-window avoids the burst of up to twice the limit allowed at fixed window edges
+RATE_LIMIT_STRATEGY = config("RATE_LIMIT_STRATEGY", default="moving-window")
+
+# Worker threads available for blocking calls run through anyio
+THREADPOOL_SIZE = config("THREADPOOL_SIZE", default=40, cast=int)
+
+# bcrypt is CPU-bound and releases the GIL, so one thread per core is enough
+PASSWORD_HASH_WORKERS = config("PASSWORD_HASH_WORKERS", default=os.cpu_count() or 1, cast=int)
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS,
+                                       thread_name_prefix="bcrypt")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Configures application-wide resources on startup and releases them on shutdown.
+    
+    Args:
+        app (FastAPI): The application instance.
+    """
+    thread_limiter = anyio.to_thread.current_default_thread_limiter()
+    thread_limiter.total_tokens = THREADPOOL_SIZE
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    mailer = start_verification_mailer()
+    yield
+    await stop_verification_mailer(mailer)
+    await close_response_cache()
+    await engine.dispose()
+
+
+# Routes used before a client holds a token, always counted per client address
+ANONYMOUS_ROUTES = frozenset({"/login", "/register", "/verify-email"})
+
+
+def rate_limit_key(request: Request) -> str:
+    """
+    Builds the rate limiting key for a request.
+    
+    Requests with a valid token are keyed by its subject, so every token of
+    a user shares one counter. Everything else, including forged or expired
+    tokens and every request to ANONYMOUS_ROUTES, is keyed by the client
+    address, so a client cannot pick whose counter it spends. Tokens are
+    checked through the cached verify_token and no database access is done.
+    
+    Args:
+        request (Request): The HTTP request object.
+        
+    Returns:
+        str: The key the request is counted under.
+    """
+    auth = request.headers.get("authorization", "")
+    if auth.startswith("Bearer ") and request.url.path not in ANONYMOUS_ROUTES:
+        try:
+            return f"user:{verify_token(auth[7:])['sub']}"
+        except (HTTPException, KeyError):
+            pass
+    return get_remote_address(request)
+
+
+limiter = Limiter(
+    key_func=rate_limit_key,
+    default_limits=["5/minute"],
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy=RATE_LIMIT_STRATEGY,
+    storage_options={"socket_keepalive": True,
+                     "max_connections": RATE_LIMIT_MAX_CONNECTIONS},
+)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 app.state.limiter = limiter
 app.add_middleware(SlowAPIMiddleware)
 
@@ -41,6 +142,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def json_response(body: bytes) -> Response:
+    """
+    Wraps an already serialized JSON body, e.g. one read from the response cache.
+    
+    Args:
+        body (bytes): The JSON body.
+        
+    Returns:
+        Response: A response sending the body as is.
+    """
+    return Response(content=body, media_type="application/json")
+
+
 # Checking exception for limiter
 @app.exception_handler(RateLimitExceeded)
 def rate_limit_handler(request: Request, exc: RateLimitExceeded):
@@ -52,26 +166,29 @@ def rate_limit_handler(request: Request, exc: RateLimitExceeded):
         exc (RateLimitExceeded): The exception raised when the rate limit is exceeded.
         
     Returns:
-        JSONResponse: A response with a 429 status code and an error message.
+        ORJSONResponse: A response with a 429 status code and an error message.
     """
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=429,
         content={"detail": "Rate limit exceeded, please try again later."},
     )
 
 
 @app.post("/users/avatar/")
-def upload_avatar(
+async def upload_avatar(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Uploads a user's avatar to Cloudinary and updates the user's avatar URL in the database.
     
+    Small files are sent in one request, larger ones are streamed from their
+    spooled temporary file in chunks. Either way the upload runs on a worker thread.
+    
     Args:
         file (UploadFile): The uploaded file object.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_user (User): The currently authenticated user.
 
     Returns:
@@ -80,9 +197,17 @@ def upload_avatar(
     Raises:
         HTTPException: If an error occurs during the upload process.
     """
+    options = {}
+    if file.size is not None and file.size < AVATAR_SINGLE_UPLOAD_MAX_SIZE:
+        uploader = cloudinary.uploader.upload
+    else:
+        uploader = cloudinary.uploader.upload_large
+        options["chunk_size"] = AVATAR_CHUNK_SIZE
     try:
-        result = cloudinary.uploader.upload(
+        result = await asyncio.to_thread(
+            uploader,
             file.file,
+            **options,
             folder="avatars",
             public_id=f"user_{current_user.id}",
             overwrite=True,
@@ -91,42 +216,71 @@ def upload_avatar(
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error uploading avatar")
     
-    current_user.avatar_url = result.get("secure_url")
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    avatar_url = result.get("secure_url")
+    current_user.avatar_url = avatar_url
+    await db.commit()
 
-    return {"avatar_url": current_user.avatar_url}
+    return {"avatar_url": avatar_url}
 
 # Get all contacts
 @app.get("/contacts/", response_model=List[ContactResponse])
-def read_contacts(skip: int = 0, 
-                  limit: int = 100, 
-                  db: Session = Depends(get_db)):
+async def read_contacts(skip: int = 0, 
+                        limit: int = 100, 
+                        after_id: Optional[int] = None,
+                        db: AsyncSession = Depends(get_db),
+                        current_user: User = Depends(get_current_user)):
     """
-    Retrieves a list of contacts with optional pagination.
+    Retrieves the current user's contacts with optional pagination.
+    
+    Passing the last id of the previous page as after_id seeks straight to
+    the next page through the (user_id, id) index, so deep pages cost the
+    same as the first one. skip is ignored when after_id is given. Pages are
+    cached per user until one of the user's contacts changes.
     
     Args:
-        skip (int): The number of records to skip. Defaults to 0.
-        limit (int): The maximum number of records to retrieve. Defaults to 100.
-        db (Session): The datavase session.
+        skip (int): The number of records to skip, negative values count as 0.
+            Defaults to 0.
+        limit (int): The maximum number of records to retrieve, clamped to
+            1..MAX_PAGE_SIZE. Defaults to 100.
+        after_id (Optional[int]): The id after which the page starts. Defaults to None.
+        db (AsyncSession): The datavase session.
+        current_user (User): The currently authenticated user.
         
     Returns:
         List[Contact]: A list of contact objects.
     """
-    contacts = db.query(Contact).offset(skip).limit(limit).all()
-    return contacts
+    skip = max(skip, 0)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    namespace = f"contacts:{current_user.id}"
+    # skip is ignored on keyset pages, so it must not split their cache entries
+    cache_key = ("after", after_id, limit) if after_id is not None else ("skip", skip, limit)
+    body, version = await get_cached(namespace, cache_key)
+    if body is not None:
+        return json_response(body)
+
+    stmt = select(Contact).where(Contact.user_id == current_user.id)
+    if after_id is not None:
+        stmt = stmt.where(Contact.id > after_id)
+    else:
+        stmt = stmt.offset(skip)
+    result = await db.execute(stmt.order_by(Contact.id).limit(limit))
+    contacts = contact_list_adapter.validate_python(result.scalars().all(), from_attributes=True)
+    body = contact_list_adapter.dump_json(contacts)
+    await set_cached(namespace, cache_key, body, version)
+    return json_response(body)
 
 
 # Get a single contact by ID
 @app.get("/contacts/{contact_id}", response_model=ContactResponse)
-def read_contact(contact_id: int, db: Session = Depends(get_db)):
+async def read_contact(contact_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieves a contact by its ID.
     
+    Found contacts are cached until they are updated or deleted.
+    
     Args:
         contact_id (int): The ID of the contact.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         
     Returns:
         Contact: The requested contact object.
@@ -134,51 +288,72 @@ def read_contact(contact_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If the contact is not found.
     """
-    db_contact = db.query(Contact).filter(Contact.id == contact_id).first()
+    namespace = f"contact:{contact_id}"
+    body, version = await get_cached(namespace, None)
+    if body is not None:
+        return json_response(body)
+
+    db_contact = await db.get(Contact, contact_id)
     if db_contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
-    return db_contact
+    body = ContactResponse.model_validate(db_contact).model_dump_json().encode()
+    await set_cached(namespace, None, body, version)
+    return json_response(body)
 
 
 # Update a contact
 @app.put("/contacts/{contact_id}", response_model=ContactResponse)
-def update_contact(contact_id: int, 
-                   contact: ContactCreate, 
-                   db: Session = Depends(get_db)):
+async def update_contact(contact_id: int, 
+                         contact: ContactCreate, 
+                         db: AsyncSession = Depends(get_db),
+                         current_user: User = Depends(get_current_user)):
     """
     Updates a contact's information.
     
+    Fields sent as null are left unchanged. The row is updated and returned
+    by a single UPDATE ... RETURNING statement.
+    
     Args:
         contact_id (int): The ID of the contact to update.
         contact (ContactCreate): The updated contact data.
-        db (Session): The datavase session.
+        db (AsyncSession): The datavase session.
+        current_user (User): The currently authenticated user.
         
     Returns:
         Contact: The updated contact object.
         
     Raises:
-        HTTPException: If the contact is not found.
+        HTTPException: If the contact is not found or belongs to another user.
     """
-    db_contact = db.query(Contact).filter(Contact.id == contact_id).first()
+    values = {
+        field: value
+        for field, value in contact.model_dump(exclude_unset=True).items()
+        if value is not None
+    }
+    stmt = (
+        update(Contact)
+        .where(Contact.id == contact_id, Contact.user_id == current_user.id)
+        .values(**values)
+        .returning(*Contact.__table__.columns)
+        .execution_options(synchronize_session=False)
+    )
+    db_contact = (await db.execute(stmt)).mappings().one_or_none()
     if db_contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
-    for var, value in vars(contact).items():
-        setattr(db_contact, var, value) if value else None
-    db.add(db_contact)
-    db.commit()
-    db.refresh(db_contact)
+    await db.commit()
+    await invalidate(f"contacts:{current_user.id}", f"contact:{contact_id}", "birthdays")
     return db_contact
     
 
 # Delete a contact
 @app.delete("/contacts/{contact_id}", response_model=ContactResponse)
-def delete_contact(contact_id: int, db: Session = Depends(get_db)):
+async def delete_contact(contact_id: int, db: AsyncSession = Depends(get_db)):
     """
     Deletes a contact by its ID.
     
     Args:
         contact_id (int): The ID of the contact to delete.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         
     Returns:
         Contact: The deleted contact object.
@@ -186,67 +361,100 @@ def delete_contact(contact_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If the contact is not found.
     """
-    db_contact = db.query(Contact).filter(Contact.id == contact_id).first()
+    db_contact = await db.get(Contact, contact_id)
     if db_contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
-    db.delete(db_contact)
-    db.commit()
+    await db.delete(db_contact)
+    await db.commit()
+    await invalidate(f"contacts:{db_contact.user_id}", f"contact:{contact_id}", "birthdays")
     return db_contact
 
 
 # Search contacts by first name, last name, or email
 @app.get("/contacts/search/", response_model=List[ContactResponse])
-def search_contacts(query: Optional[str] = Query(None), 
-                    db: Session = Depends(get_db)):
+async def search_contacts(query: Optional[str] = Query(None), 
+                          db: AsyncSession = Depends(get_db)):
     """
     Searches contacts by first name, last name, or email.
     
+    The fields are matched as one concatenated string so that PostgreSQL can
+    serve the substring match from the contacts_search_trgm GIN index. Missing
+    fields are treated as empty so they do not null out the whole string.
+    
     Args:
         query (Optional[str]): The search query. Defeults to None.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         
     Returns:
         List[Contact]: A list of matching contacts.
     """
     if query:
-        contacts = db.query(Contact).filter(
-            (Contact.first_name.ilike(f"%{query}%")) |
-            (Contact.last_name.ilike(f"%{query}%")) |
-            (Contact.email.ilike(f"%{query}%"))
-        ).all()
-        return contacts
+        space = literal_column("' '")
+        empty = literal_column("''")
+        search_text = (
+            func.coalesce(Contact.first_name, empty) + space
+            + func.coalesce(Contact.last_name, empty) + space
+            + func.coalesce(Contact.email, empty)
+        )
+        result = await db.execute(
+            select(Contact)
+            .where(search_text.ilike(f"%{query}%"))
+            .limit(SEARCH_RESULTS_LIMIT)
+        )
+        return result.scalars().all()
     return []
 
 
 # Get contacts with birthdays in the next 7 days
 @app.get("/contacts/birthdays/", response_model=List[ContactResponse])
-def upcoming_birthdays(db: Session = Depends(get_db)):
+async def upcoming_birthdays(db: AsyncSession = Depends(get_db)):
     """
     Retrieves contacts with birthdays in the next 7 days.
     
+    The birth year is ignored: birthdays are compared on the indexed
+    birthday_mmdd column (month * 100 + day). A window crossing the new year
+    is split into two ranges. Rows are streamed from a server-side cursor in
+    batches and converted to response models as they arrive, so only one batch
+    of ORM objects is alive at a time. The result is cached for the day for
+    up to BIRTHDAYS_CACHE_TTL seconds, or until a contact changes.
+    
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         
     Returns:
         List[Contact]: A list of contacts with upcoming bithdays.
     """
     today = datetime.today().date()
+    body, version = await get_cached("birthdays", today)
+    if body is not None:
+        return json_response(body)
+
     next_week = today + timedelta(days=7)
-    contacts = db.query(Contact).filter(
-        (Contact.birthday >= today) & (Contact.birthday <= next_week)
-    ).all()
-    return contacts
+    start = today.month * 100 + today.day
+    end = next_week.month * 100 + next_week.day
+
+    month_day = Contact.birthday_mmdd
+    if start <= end:
+        window = month_day.between(start, end)
+    else:
+        window = (month_day >= start) | (month_day <= end)
+    stmt = select(Contact).where(window).execution_options(yield_per=BIRTHDAYS_FETCH_SIZE)
+    contacts = await db.stream_scalars(stmt)
+    contacts = [ContactResponse.model_validate(contact) async for contact in contacts]
+    body = contact_list_adapter.dump_json(contacts)
+    await set_cached("birthdays", today, body, version, ttl=BIRTHDAYS_CACHE_TTL)
+    return json_response(body)
 
 
 @app.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), 
-          db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), 
+                db: AsyncSession = Depends(get_db)):
     """
     Authenticates a user and generates access and refresh tokens.
     
     Args:
         form_data (OAuth2PaswordRequestForm): The login form data.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         
     Returns:
         Token: The generated access and refresh tokens.
@@ -254,11 +462,15 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(),
     Raises:
         HTTPException: If the credentials are invalid.
     """
-    user = db.query(User).filter(
-        User.email == form_data.username
-        ).first()
-    if not user or not verify_password(form_data.password, 
-                                       user.hashed_password):
+    result = await db.execute(
+        select(User).where(User.email == form_data.username)
+        )
+    user = result.scalar_one_or_none()
+    # Unknown users still pay for one bcrypt check to avoid a timing oracle
+    hashed_password = user.hashed_password if user else None
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(password_executor, verify_password,
+                                      form_data.password, hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     access_token = create_access_token({"sub": user.email})
     refresh_token = create_refresh_token({"sub": user.email})
@@ -269,15 +481,18 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(),
 
 @app.post("/contacts/", response_model=ContactResponse)
 @limiter.limit("5/minute")
-def create_contact(request: Request, contact: ContactCreate,
-                   db: Session = Depends(get_db),
-                   current_user: User = Depends(get_current_user)):
+async def create_contact(request: Request, contact: ContactCreate,
+                         db: AsyncSession = Depends(get_db),
+                         current_user: User = Depends(get_current_user)):
     """
     Creates a new contact for the authenticated user.
     
+    The contact is inserted with INSERT ... ON CONFLICT DO NOTHING RETURNING,
+    so a duplicate (user_id, email) pair is detected in the same round trip.
+    
     Args:
         contact (ContactCreate): The contact data to create.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_user (User): The currently authenticated user.
         
     Returns:
@@ -286,32 +501,33 @@ def create_contact(request: Request, contact: ContactCreate,
     Raises:
         HTTPException: If a ontact with the same email already exists.
     """
-    existing_contact = db.query(Contact).filter(
-        Contact.email == contact.email,
-        Contact.user_id == current_user.id
-    ).first()
-
-    if existing_contact:
+    stmt = (
+        insert(Contact)
+        .values(**contact.model_dump(exclude_unset=True), user_id=current_user.id)
+        .on_conflict_do_nothing(index_elements=["user_id", "email"])
+        .returning(*Contact.__table__.columns)
+    )
+    db_contact = (await db.execute(stmt)).mappings().one_or_none()
+    if db_contact is None:
         raise HTTPException(
             status_code=400,
             detail="Contact with this email already exists"
         )
-    
-    db_contact = Contact(**contact.model_dump(), user_id=current_user.id)
-    db.add(db_contact)
-    db.commit()
-    db.refresh(db_contact)
+    await db.commit()
+    await invalidate(f"contacts:{current_user.id}", "birthdays")
     return db_contact
 
 
 @app.post("/register", response_model=UserResponse, status_code=201)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Registers a new user and sends a verification email.
     
+    The email is queued and sent with the next batch after the response is returned.
+    
     Args:
         user (UserCreate): The user data for registration.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         
     Returns:
         UserResponse: The registered user object.
@@ -319,30 +535,35 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If the email is already registered.
     """
-    existing_user = db.query(User).filter(User.email == user.email).first()
+    result = await db.execute(
+        select(User).where(User.email == user.email)
+        )
+    existing_user = result.scalar_one_or_none()
     if existing_user:
         raise HTTPException(status_code=409, detail="Email already registered")
     
-    hashed_password = hash_password(user.password)
+    loop = asyncio.get_running_loop()
+    hashed_password = await loop.run_in_executor(password_executor, hash_password,
+                                                 user.password)
     new_user = User(email=user.email, hashed_password=hashed_password)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    # The insert returns the id and nothing else is generated, so no refresh
+    await db.commit()
 
     verification_token = create_access_token({"sub": new_user.email})
-    send_verification_email(new_user.email, verification_token)
+    enqueue_verification_email(new_user.email, verification_token)
 
     return new_user
 
 
 @app.get("/verify-email")
-def verify_email(token: str, db: Session = Depends(get_db)):
+async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
     """
     Verifies a user's email using a token.
     
     Args:
         token (str): The email verification token.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         
     Returns:
         dict: A success message if the email is verified.
@@ -356,7 +577,10 @@ def verify_email(token: str, db: Session = Depends(get_db)):
         if not email:
             raise HTTPException(status_code=400, detail="Invalid token")
         
-        user = db.query(User).filter(User.email == email).first()
+        result = await db.execute(
+            select(User).where(User.email == email)
+            )
+        user = result.scalar_one_or_none()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -364,7 +588,8 @@ def verify_email(token: str, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="Email already verified")
         
         user.is_verified = True
-        db.commit()
+        await db.commit()
+        invalidate_user_cache(email)
         return {"message": "Email successfully verified"}
     except HTTPException as e:
         raise e
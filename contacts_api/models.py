@@ -6,7 +6,7 @@ Classes:
     User: Represents a user entity with attributes like email, hashed password, and verification status.
 """
 
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, SmallInteger, String, Date, ForeignKey, Boolean, Computed, DDL, Index, UniqueConstraint, event, extract, func
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -19,27 +19,55 @@ class Contact(Base):
         id (int): The unique identifier of the contact.
         first_name (str): The first name of the contact.
         last_name (str): The last name of the contact.
-        email (str): The email address of the contact (unique).
+        email (str): The email address of the contact (unique per user).
         phone_number (str): The phone number of the contact.
         birthday (date): The birthday of the contact.
+        birthday_mmdd (int): The birthday as month * 100 + day, generated from birthday.
         additional_data (str): Additional notes or information about the contact (ptional).
         user_if (int): The ID of the user who owns this contact (foreign key).
         owner (User): A relationship to the User who owns this contact.
     """
     __tablename__ = "contacts"
+    __table_args__ = (
+        # Also serves lookups by user_id alone
+        UniqueConstraint("user_id", "email", name="uq_contacts_user_email"),
+        # Keyset pagination of a user's contacts in id order
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String, index=True)
     last_name = Column(String, index=True)
-    email = Column(String, unique=True, index=True)
+    email = Column(String)
     phone_number = Column(String)
     birthday = Column(Date)
+    birthday_mmdd = Column(
+        SmallInteger,
+        Computed(extract("month", birthday) * 100 + extract("day", birthday)),
+        index=True,
+    )
     additional_data = Column(String, nullable=True)
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     owner = relationship("User", back_populates="contacts")
 
+
+# Trigram index serving the substring search; matches the search_contacts expression
+Index(
+    "contacts_search_trgm",
+    (func.coalesce(Contact.first_name, "") + " " + func.coalesce(Contact.last_name, "")
+     + " " + func.coalesce(Contact.email, "")).label("search_text"),
+    postgresql_using="gin",
+    postgresql_ops={"search_text": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+
+event.listen(
+    Contact.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 class User(Base):
     """
     Represents a user entity in the database.
@@ -0,0 +1,226 @@
+"""
+Module for caching read endpoint responses.
+
+Serialized responses are grouped into namespaces, e.g. one per user, and a
+write drops its whole namespace at once. RESPONSE_CACHE_URL picks where the
+namespaces live:
+
+- empty (the default): caching is disabled.
+- memory://: in the worker process. A write only invalidates the worker
+  that handled it, so this is meant for single-worker deployments.
+- redis://...: in Redis, shared by every worker.
+
+A namespace expires TTL seconds after the last response stored in it.
+
+Every invalidation also bumps the namespace version. Lookups return the
+version along with the body and a response is only stored while the version
+is unchanged, so a reader that queried the database before a write cannot
+put its stale response back after the write invalidated the namespace.
+"""
+
+import itertools
+import logging
+import time
+
+from cachetools import TLRUCache
+from collections import OrderedDict
+from decouple import config
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from typing import Hashable, Optional, Tuple
+
+
+RESPONSE_CACHE_URL = config("RESPONSE_CACHE_URL", default="")
+RESPONSE_CACHE_SIZE = config("RESPONSE_CACHE_SIZE", default=10000, cast=int)
+RESPONSE_CACHE_TTL = config("RESPONSE_CACHE_TTL", default=30, cast=int)
+
+# Redis version counters outlive any request that could still hold their value
+VERSION_TTL = 86400
+
+# Stores a response only if the namespace version is the one the reader saw
+_STORE_IF_CURRENT = """
+if tonumber(redis.call('GET', KEYS[2]) or '0') ~= tonumber(ARGV[4]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCache:
+    """
+    Namespaces kept in the worker process.
+
+    At most maxsize namespaces are kept, the least recently used is evicted first.
+    Versions of the last maxsize invalidated namespaces are kept as well; all
+    older ones read as the newest evicted version, which at worst makes a
+    reader skip storing its response.
+    """
+
+    def __init__(self, maxsize: int, timer=time.monotonic):
+        # Values are (ttl, responses) pairs so each namespace can expire on its own
+        self._namespaces = TLRUCache(maxsize=maxsize, timer=timer,
+                                     ttu=lambda name, value, now: now + value[0])
+        # Versions come from one counter, so the dict stays ordered by version
+        self._versions = OrderedDict()
+        self._counter = itertools.count(1)
+        self._evicted_version = 0
+        self._maxsize = maxsize
+
+    def _version(self, namespace: str) -> int:
+        return self._versions.get(namespace, self._evicted_version)
+
+    async def get(self, namespace: str, key: Hashable) -> Tuple[Optional[bytes], int]:
+        value = self._namespaces.get(namespace)
+        body = None if value is None else value[1].get(key)
+        return body, self._version(namespace)
+
+    async def set(self, namespace: str, key: Hashable, body: bytes, ttl: int, version: int):
+        if self._version(namespace) != version:
+            return
+        value = self._namespaces.get(namespace)
+        responses = {} if value is None else value[1]
+        responses[key] = body
+        # Storing the pair again restarts the namespace TTL
+        self._namespaces[namespace] = (ttl, responses)
+
+    async def delete(self, *namespaces: str):
+        for namespace in namespaces:
+            self._versions.pop(namespace, None)
+            self._versions[namespace] = next(self._counter)
+            if len(self._versions) > self._maxsize:
+                _, self._evicted_version = self._versions.popitem(last=False)
+            self._namespaces.pop(namespace, None)
+
+    async def close(self):
+        pass
+
+
+class RedisCache:
+    """
+    Namespaces stored as Redis hashes shared by every worker.
+
+    Versions are counters next to the hashes and the version check and the
+    store run as one Lua script. Redis errors are logged and treated as
+    cache misses.
+    """
+
+    def __init__(self, url: str):
+        self._redis = aioredis.from_url(url)
+        self._store_if_current = self._redis.register_script(_STORE_IF_CURRENT)
+
+    async def get(self, namespace: str, key: Hashable) -> Tuple[Optional[bytes], int]:
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.get(f"response-cache-version:{namespace}")
+                pipe.hget(f"response-cache:{namespace}", str(key))
+                version, body = await pipe.execute()
+        except RedisError:
+            logger.warning("Response cache lookup failed", exc_info=True)
+            # Versions are never negative, so the response will not be stored
+            return None, -1
+        return body, int(version or 0)
+
+    async def set(self, namespace: str, key: Hashable, body: bytes, ttl: int, version: int):
+        keys = [f"response-cache:{namespace}", f"response-cache-version:{namespace}"]
+        try:
+            await self._store_if_current(keys=keys, args=[str(key), body, ttl, version])
+        except RedisError:
+            logger.warning("Response cache store failed", exc_info=True)
+
+    async def delete(self, *namespaces: str):
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                # Versions are bumped before the hashes go, so no reader can store in between
+                for namespace in namespaces:
+                    pipe.incr(f"response-cache-version:{namespace}")
+                    pipe.expire(f"response-cache-version:{namespace}", VERSION_TTL)
+                pipe.delete(*(f"response-cache:{namespace}" for namespace in namespaces))
+                await pipe.execute()
+        except RedisError:
+            logger.exception("Failed to invalidate cached responses for %s", namespaces)
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+def create_cache(url: str):
+    """
+    Builds the cache backend for a RESPONSE_CACHE_URL value.
+
+    Args:
+        url (str): An empty string, memory:// or a redis:// URL.
+
+    Returns:
+        The cache backend, or None if caching is disabled.
+    """
+    if not url:
+        return None
+    if url == "memory://":
+        return MemoryCache(RESPONSE_CACHE_SIZE)
+    return RedisCache(url)
+
+
+_cache = create_cache(RESPONSE_CACHE_URL)
+
+
+async def get_cached(namespace: str, key: Hashable) -> Tuple[Optional[bytes], int]:
+    """
+    Looks up a cached response body.
+
+    Call it before reading the database, so the returned version predates
+    the data a response built on a miss comes from.
+
+    Args:
+        namespace (str): The namespace the response was stored under.
+        key (Hashable): The request parameters identifying the response.
+
+    Returns:
+        Tuple[Optional[bytes], int]: The cached JSON body, or None if caching
+            is disabled or the response is missing or expired, and the
+            namespace version to pass to set_cached.
+    """
+    if _cache is None:
+        return None, 0
+    return await _cache.get(namespace, key)
+
+
+async def set_cached(namespace: str, key: Hashable, body: bytes, version: int,
+                     ttl: int = RESPONSE_CACHE_TTL):
+    """
+    Stores a response body until its namespace expires or is invalidated.
+
+    Nothing is stored if the namespace was invalidated after get_cached
+    returned the version.
+
+    Args:
+        namespace (str): The namespace to store the response under.
+        key (Hashable): The request parameters identifying the response.
+        body (bytes): The serialized JSON response.
+        version (int): The namespace version returned by get_cached.
+        ttl (int): Seconds the namespace stays valid. Defaults to RESPONSE_CACHE_TTL.
+    """
+    if _cache is not None:
+        await _cache.set(namespace, key, body, ttl, version)
+
+
+async def invalidate(*namespaces: str):
+    """
+    Drops every cached response in the given namespaces.
+
+    Args:
+        *namespaces (str): The namespaces to invalidate.
+    """
+    if _cache is not None:
+        await _cache.delete(*namespaces)
+
+
+async def close_response_cache():
+    """
+    Releases the connections held by the cache backend.
+    """
+    if _cache is not None:
+        await _cache.close()
@@ -0,0 +1,122 @@
+"""
+Module for reusing SMTP connections across outgoing emails.
+
+Connections are opened lazily, health-checked before reuse, and closed
+when the interpreter exits.
+"""
+
+import atexit
+import queue
+import smtplib
+import time
+
+from contextlib import contextmanager
+from decouple import config
+
+
+SMTP_HOST = config("SMTP_HOST", default="smtp.gmail.com")
+SMTP_PORT = config("SMTP_PORT", default=587, cast=int)
+SMTP_POOL_SIZE = config("SMTP_POOL_SIZE", default=5, cast=int)
+SMTP_IDLE_TIMEOUT = config("SMTP_IDLE_TIMEOUT", default=60, cast=int)
+
+# Idle connections stored as (server, last_used_ts) pairs
+_pool = queue.Queue(maxsize=SMTP_POOL_SIZE)
+
+
+def _connect() -> smtplib.SMTP:
+    """
+    Opens a new authenticated SMTP connection.
+
+    Returns:
+        smtplib.SMTP: The connected and logged in SMTP client.
+    """
+    server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
+    server.starttls()
+    server.login(config("SMTP_EMAIL"), config("SMTP_PASSWORD"))
+    return server
+
+
+def _close(server: smtplib.SMTP):
+    """
+    Closes an SMTP connection, ignoring errors from dead sockets.
+
+    Args:
+        server (smtplib.SMTP): The connection to close.
+    """
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
+
+
+def _is_alive(server: smtplib.SMTP, last_used: float) -> bool:
+    """
+    Checks whether a pooled connection can still be used.
+
+    Args:
+        server (smtplib.SMTP): The pooled connection.
+        last_used (float): Monotonic time the connection was last released.
+
+    Returns:
+        bool: True if the connection answered NOOP and has not been idle too long.
+    """
+    if time.monotonic() - last_used > SMTP_IDLE_TIMEOUT:
+        return False
+    try:
+        return server.noop()[0] == 250
+    except (smtplib.SMTPServerDisconnected, smtplib.SMTPException, OSError):
+        return False
+
+
+@contextmanager
+def get_smtp():
+    """
+    Provides a ready to use SMTP connection from the pool.
+
+    A pooled connection is reused if it passes the health check, otherwise
+    a new one is opened. The connection goes back to the pool on success
+    and is closed if sending fails.
+
+    Yields:
+        smtplib.SMTP: The connected SMTP client.
+
+    Example:
+        with get_smtp() as server:
+            server.sendmail(...)
+    """
+    server = None
+    while server is None:
+        try:
+            pooled, last_used = _pool.get_nowait()
+        except queue.Empty:
+            break
+        if _is_alive(pooled, last_used):
+            server = pooled
+        else:
+            _close(pooled)
+    if server is None:
+        server = _connect()
+
+    try:
+        yield server
+    except Exception:
+        _close(server)
+        raise
+
+    try:
+        _pool.put_nowait((server, time.monotonic()))
+    except queue.Full:
+        _close(server)
+
+
+@atexit.register
+def close_all():
+    """
+    Closes every idle connection left in the pool.
+    """
+    while True:
+        try:
+            server, _ = _pool.get_nowait()
+        except queue.Empty:
+            return
+        _close(server)
@@ -1,39 +1,51 @@
+import asyncio
 from fastapi.testclient import TestClient
+from auth import hash_password
 from main import app  
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 from database import Base, get_db  
 from models import User, Contact
 from schemas import ContactCreate
 
 # Налаштування для бази даних для тестування
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"  # Використовуємо in-memory базу даних для тестування
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"  # Використовуємо in-memory базу даних для тестування
+# StaticPool тримає одне з'єднання, тож in-memory база не зникає між сесіями
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL, poolclass=StaticPool)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 # Створення таблиць для тестів
-Base.metadata.create_all(bind=engine)
+async def create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+asyncio.run(create_tables())
 
 # Мокання бази даних
-def override_get_db():
+async def override_get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
 
 app.dependency_overrides[get_db] = override_get_db
 
 client = TestClient(app)
 
 # Створення тестових даних
+async def _create_test_user():
+    async with SessionLocal() as db:
+        user = User(email="testuser@example.com",
+                    hashed_password=hash_password("testpassword"),
+                    is_verified=True)
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+        return user
+
 def create_test_user():
-    db = SessionLocal()
-    user = User(email="testuser@example.com", hashed_password="testpassword")
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    return asyncio.run(_create_test_user())
 
 def test_create_contact():
     user = create_test_user()
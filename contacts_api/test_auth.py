@@ -1,8 +1,9 @@
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
-from jose import jwt
-from passlib.context import CryptContext
+import jwt
+from fastapi import HTTPException
 from smtplib import SMTPException
 from auth import (
     hash_password,
@@ -36,6 +37,10 @@ class TestAuthModule(unittest.TestCase):
         """Test if password verification works correctly."""
         self.assertFalse(verify_password("wrong_password", self.hashed_password))
 
+    def test_verify_password_unknown_user(self):
+        """Test if a missing hash is rejected after a dummy check."""
+        self.assertFalse(verify_password(self.password, None))
+
     def test_create_access_token(self):
         """Test if access token is generated correctly."""
         decoded_token = jwt.decode(self.token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -48,6 +53,14 @@ class TestAuthModule(unittest.TestCase):
         self.assertEqual(decoded_token["sub"], self.data["sub"])
         self.assertIn("exp", decoded_token)
 
+    def test_token_expiry(self):
+        """Test if tokens expire after the configured lifetimes."""
+        now = time.time()
+        access = jwt.decode(self.token, SECRET_KEY, algorithms=[ALGORITHM])
+        refresh = jwt.decode(self.refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+        self.assertAlmostEqual(access["exp"], now + ACCESS_TOKEN_EXPIRE_MINUTES * 60, delta=5)
+        self.assertAlmostEqual(refresh["exp"], now + REFRESH_TOKEN_EXPIRE_DAYS * 86400, delta=5)
+
     def test_verify_token_valid(self):
         """Test if token verification works for a valid token."""
         payload = verify_token(self.token)
@@ -58,6 +71,25 @@ class TestAuthModule(unittest.TestCase):
         with self.assertRaises(Exception):
             verify_token("invalid_token")
 
+    @patch("auth.jwt.decode", wraps=jwt.decode)
+    def test_verify_token_cached(self, mock_decode):
+        """Test if a repeated token is served from the cache."""
+        token = create_access_token({"sub": "cached@example.com"})
+        verify_token(token)
+        verify_token(token)
+        mock_decode.assert_called_once()
+
+    def test_verify_token_cache_respects_expiry(self):
+        """Test if an expired token is re-verified instead of served from the cache."""
+        token = create_access_token({"sub": "expiring@example.com"})
+        verify_token(token)
+        later = time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60 + 1
+        with patch("auth.time.time", return_value=later), \
+                patch("auth.jwt.decode", side_effect=jwt.ExpiredSignatureError) as mock_decode:
+            with self.assertRaises(HTTPException) as context:
+                verify_token(token)
+        mock_decode.assert_called_once()
+        self.assertEqual(context.exception.status_code, 401)
 
     @patch("smtplib.SMTP", side_effect=SMTPException("SMTP error"))
     def test_send_verification_email_failure(self, mock_smtp):
@@ -1,28 +1,31 @@
+import asyncio
 import unittest
 from unittest.mock import patch, MagicMock
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db, SessionLocal
 
 
-class TestDatabaseModule(unittest.TestCase):
+class TestDatabaseModule(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         """Set up mock database session."""
-        self.mock_session = MagicMock(spec=Session)
+        self.mock_session = MagicMock(spec=AsyncSession)
 
     @patch("database.SessionLocal")
-    def test_get_db_yields_session(self, mock_session_local):
+    async def test_get_db_yields_session(self, mock_session_local):
         """
         Test if get_db correctly yields a database session and closes it afterward.
         """
         mock_session_local.return_value = self.mock_session
 
-        db = next(get_db())
+        generator = get_db()
+        db = await anext(generator)
         self.assertEqual(db, self.mock_session)
+        await generator.aclose()
         
-        self.mock_session.close.assert_called_once()
+        self.mock_session.close.assert_awaited_once()
 
     @patch("database.SessionLocal")
-    def test_get_db_closes_session_on_exception(self, mock_session_local):
+    async def test_get_db_closes_session_on_exception(self, mock_session_local):
         """
         Test if get_db correctly closes the database session in case of an exception.
         """
@@ -30,15 +33,39 @@ class TestDatabaseModule(unittest.TestCase):
 
         generator = get_db()
         try:
-            db = next(generator)
+            db = await anext(generator)
             self.assertEqual(db, self.mock_session)
             raise RuntimeError("Simulated exception")
         except RuntimeError as e:
             self.assertEqual(str(e), "Simulated exception")
         finally:
-            generator.close()
+            await generator.aclose()
+
+        self.mock_session.close.assert_awaited_once()
+
+    @patch("database.SessionLocal")
+    async def test_get_db_close_survives_cancellation(self, mock_session_local):
+        """
+        Test if the session is still closed when the request is cancelled during cleanup.
+        """
+        closed = asyncio.Event()
+
+        async def slow_close():
+            await asyncio.sleep(0.01)
+            closed.set()
+
+        self.mock_session.close.side_effect = slow_close
+        mock_session_local.return_value = self.mock_session
+
+        generator = get_db()
+        await anext(generator)
+        cleanup = asyncio.create_task(generator.aclose())
+        await asyncio.sleep(0)
+        cleanup.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await cleanup
 
-        self.mock_session.close.assert_called_once()
+        await asyncio.wait_for(closed.wait(), timeout=1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,31 @@
+import base64
+import unittest
+from jwt.utils import base64url_decode as stock_decode, base64url_encode as stock_encode
+from jwt_base64 import base64url_decode, base64url_encode
+
+
+class TestJWTBase64Module(unittest.TestCase):
+    def setUp(self):
+        """Set up inputs covering every padding length."""
+        self.samples = [b"", b"a", b"ab", b"abc", b"abcd", bytes(range(256))]
+
+    def test_encode_matches_pyjwt(self):
+        """Test if encoding matches PyJWT's implementation."""
+        for sample in self.samples:
+            self.assertEqual(base64url_encode(sample), stock_encode(sample))
+
+    def test_decode_matches_pyjwt(self):
+        """Test if decoding unpadded input matches PyJWT's implementation."""
+        for sample in self.samples:
+            encoded = stock_encode(sample)
+            self.assertEqual(base64url_decode(encoded), stock_decode(encoded))
+            self.assertEqual(base64url_decode(encoded.decode()), sample)
+
+    def test_decode_rejects_invalid_input(self):
+        """Test if malformed input raises the same error type as PyJWT."""
+        with self.assertRaises(base64.binascii.Error):
+            base64url_decode(b"a")
+
+
+if __name__ == "__main__":
+    unittest.main()
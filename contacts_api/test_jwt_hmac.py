@@ -0,0 +1,45 @@
+import hmac
+import hashlib
+import unittest
+import jwt
+from jwt.algorithms import HMACAlgorithm
+from jwt_hmac import PrecomputedHMACAlgorithm
+
+
+class TestJWTHMACModule(unittest.TestCase):
+    def setUp(self):
+        """Set up the algorithm with a known secret."""
+        self.secret = b"test_secret_key_with_enough_bytes"
+        self.algorithm = PrecomputedHMACAlgorithm(HMACAlgorithm.SHA256, self.secret)
+        self.msg = b"header.payload"
+
+    def test_sign_matches_hmac(self):
+        """Test if signatures match a freshly keyed HMAC."""
+        key = self.algorithm.prepare_key(self.secret)
+        expected = hmac.new(self.secret, self.msg, hashlib.sha256).digest()
+        self.assertEqual(self.algorithm.sign(self.msg, key), expected)
+
+    def test_verify_rejects_wrong_signature(self):
+        """Test if verification fails for a tampered signature."""
+        key = self.algorithm.prepare_key(self.secret)
+        signature = self.algorithm.sign(self.msg, key)
+        self.assertTrue(self.algorithm.verify(self.msg, key, signature))
+        self.assertFalse(self.algorithm.verify(b"other.payload", key, signature))
+
+    def test_other_key_uses_regular_path(self):
+        """Test if keys other than the configured secret are still honoured."""
+        other = b"another_secret_key_with_enough_bytes"
+        key = self.algorithm.prepare_key(other)
+        expected = hmac.new(other, self.msg, hashlib.sha256).digest()
+        self.assertEqual(self.algorithm.sign(self.msg, key), expected)
+
+    def test_tokens_interoperate_with_pyjwt(self):
+        """Test if tokens round-trip against the stock HMAC implementation."""
+        jws = jwt.PyJWS(algorithms=[])
+        jws.register_algorithm("HS256", self.algorithm)
+        token = jws.encode(b"{}", self.secret, algorithm="HS256")
+        self.assertEqual(jwt.PyJWS().decode(token, self.secret, algorithms=["HS256"]), b"{}")
+
+
+if __name__ == "__main__":
+    unittest.main()
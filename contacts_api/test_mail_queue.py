@@ -0,0 +1,110 @@
+import asyncio
+import unittest
+import mail_queue
+from unittest.mock import patch, MagicMock
+from contextlib import contextmanager
+from smtplib import SMTPRecipientsRefused
+from mail_queue import send_verification_batch
+
+
+def fake_smtp(server):
+    """Build a get_smtp replacement yielding the given server."""
+    @contextmanager
+    def _get_smtp():
+        yield server
+    return _get_smtp
+
+
+class TestMailQueueModule(unittest.TestCase):
+    def setUp(self):
+        """Set up a batch of queued emails."""
+        self.batch = [(f"user{i}@example.com", f"token{i}") for i in range(6)]
+
+    def test_send_verification_batch_uses_one_connection(self):
+        """Test if every email in a batch is sent over the same connection."""
+        server = MagicMock()
+        server.has_extn.return_value = False
+        with patch("mail_queue.get_smtp", fake_smtp(server)):
+            unsent = send_verification_batch(self.batch)
+
+        self.assertEqual(unsent, [])
+        self.assertEqual(server.sendmail.call_count, len(self.batch))
+
+    def test_send_verification_batch_pipelines_commands(self):
+        """Test if MAIL, RCPT and DATA are written together when supported."""
+        server = MagicMock()
+        server.has_extn.return_value = True
+        server.getreply.side_effect = [(250, b"OK"), (250, b"OK"), (354, b"Go"), (250, b"OK")]
+        with patch("mail_queue.get_smtp", fake_smtp(server)):
+            unsent = send_verification_batch(self.batch[:1])
+
+        self.assertEqual(unsent, [])
+        first_write = server.send.call_args_list[0].args[0]
+        self.assertIn("MAIL FROM:", first_write)
+        self.assertIn("RCPT TO:<user0@example.com>", first_write)
+        self.assertTrue(first_write.endswith("DATA\r\n"))
+        server.sendmail.assert_not_called()
+
+    def test_send_verification_batch_aborts_after_failures(self):
+        """Test if a batch stops once more than a third of it fails."""
+        server = MagicMock()
+        server.has_extn.return_value = False
+        server.sendmail.side_effect = SMTPRecipientsRefused({})
+        with patch("mail_queue.get_smtp", fake_smtp(server)):
+            unsent = send_verification_batch(self.batch)
+
+        self.assertEqual(server.sendmail.call_count, 3)
+        self.assertEqual(unsent, self.batch[3:])
+
+    def test_stop_verification_mailer_flushes_queue(self):
+        """Test if emails still queued at shutdown are sent."""
+        async def run():
+            with patch("mail_queue.MAIL_FLUSH_INTERVAL", 3600):
+                mailer = mail_queue.start_verification_mailer()
+                for email, token in self.batch:
+                    mail_queue.enqueue_verification_email(email, token)
+                await asyncio.sleep(0)
+                await mail_queue.stop_verification_mailer(mailer)
+
+        # Start from an empty queue even if other tests enqueued emails in this process
+        with patch("mail_queue.verification_queue", asyncio.Queue()), \
+                patch("mail_queue.send_verification_batch", return_value=[]) as send:
+            asyncio.run(run())
+            self.assertTrue(mail_queue.verification_queue.empty())
+
+        sent = [item for call in send.call_args_list for item in call.args[0]]
+        self.assertCountEqual(sent, self.batch)
+
+    def test_mailer_drops_emails_after_max_attempts(self):
+        """Test if a batch that keeps failing is dropped after MAIL_MAX_ATTEMPTS."""
+        async def run():
+            with patch("mail_queue.MAIL_FLUSH_INTERVAL", 0), \
+                    patch("mail_queue.MAIL_MAX_ATTEMPTS", 3):
+                mailer = mail_queue.start_verification_mailer()
+                mail_queue.enqueue_verification_email("user0@example.com", "token0")
+                while send.call_count < 3 or not mail_queue.verification_queue.empty():
+                    await asyncio.sleep(0.01)
+                # A fourth attempt would show up here or in the shutdown flush
+                await asyncio.sleep(0.05)
+                await mail_queue.stop_verification_mailer(mailer)
+
+        with patch("mail_queue.verification_queue", asyncio.Queue()), \
+                patch("mail_queue.send_verification_batch",
+                      side_effect=OSError("Connection refused")) as send, \
+                self.assertLogs("mail_queue", level="ERROR") as logs:
+            asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+        self.assertEqual(send.call_count, 3)
+        self.assertIn("after 3 attempts", logs.output[-1])
+
+    def test_enqueue_drops_emails_when_queue_is_full(self):
+        """Test if emails beyond MAIL_QUEUE_SIZE are dropped instead of raising."""
+        with patch("mail_queue.verification_queue", asyncio.Queue(maxsize=1)), \
+                self.assertLogs("mail_queue", level="ERROR"):
+            mail_queue.enqueue_verification_email("user0@example.com", "token0")
+            mail_queue.enqueue_verification_email("user1@example.com", "token1")
+            self.assertEqual(mail_queue.verification_queue.qsize(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,113 +1,452 @@
+import asyncio
+import httpx
+import json
+import jwt
+import time
 import unittest
+from unittest.mock import patch
 from fastapi.testclient import TestClient
-from main import app 
-from database import get_db, SessionLocal
-from models import Base, User, Contact
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from auth import create_access_token
+from main import app, limiter
+import response_cache
+from response_cache import MemoryCache, RESPONSE_CACHE_SIZE
+from database import get_db
+from models import User, Contact
+from datetime import date, datetime, timedelta
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 
 
-class TestAPI(unittest.TestCase):
+# Контакти для тестів, яким потрібні дані, а не сам POST /contacts/
+SEED_CONTACTS = [
+    {"first_name": "John", "last_name": "Doe", "email": "johndoe@example.com",
+     "phone_number": "1234567890", "birthday": date(1990, 1, 1)},
+    {"first_name": "Jane", "last_name": "Doe", "email": "janedoe@example.com",
+     "phone_number": "0987654321", "birthday": date(1992, 2, 2)},
+]
+
+
+# Тіла запитів серіалізуються один раз на модуль
+JSON_HEADERS = {"content-type": "application/json"}
+_REGISTER_TEST_USER = json.dumps({"email": "test@example.com", "password": "password"}).encode()
+_CONTACT_JOHN = json.dumps({
+    "first_name": "John",
+    "last_name": "Doe",
+    "email": "johndoe@example.com",
+    "phone_number": "1234567890",
+    "birthday": "1990-01-01"
+}).encode()
+_CONTACT_JOHNNY = json.dumps({
+    "first_name": "Johnny",
+    "last_name": "Doe",
+    "email": "johndoe@example.com",
+    "phone_number": "1234567890",
+    "birthday": "1990-01-01"
+}).encode()
+
+
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    """Забороняємо драйверу sqlite керувати транзакціями, щоб SAVEPOINT-и вкладалися."""
+    dbapi_connection.isolation_level = None
+
+
+def _emit_begin(conn):
+    """Відкриваємо зовнішню транзакцію самі замість драйвера."""
+    conn.exec_driver_sql("BEGIN")
+
+
+class APITestCase(unittest.TestCase):
+    """Спільні застосунок, база і користувач для тестових класів API."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Налаштовуємо тестову базу один раз для всього класу
+        cls.SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite://"
+        # StaticPool ділить одне з'єднання, тож усі сесії бачать ту саму in-memory базу
+        cls.engine = create_async_engine(cls.SQLALCHEMY_DATABASE_URL, poolclass=StaticPool)
+        event.listen(cls.engine.sync_engine, "connect", _disable_driver_transactions)
+        event.listen(cls.engine.sync_engine, "begin", _emit_begin)
+        cls.TestingSession = async_sessionmaker(bind=cls.engine, autoflush=False,
+                                                expire_on_commit=False)
+
+        async def override_get_db():
+            db = cls.TestingSession()
+            try:
+                yield db
+            finally:
+                await db.close()
+
+        # Інші тестові модулі могли встановити власну підміну бази
+        cls._previous_get_db = app.dependency_overrides.get(get_db)
+        cls._class_get_db = override_get_db
+        app.dependency_overrides[get_db] = override_get_db
+
+        cls._patches = [
+            # bcrypt коштує ~100 мс на виклик і нічого не перевіряє в цих тестах
+            patch("bcrypt.hashpw", lambda password, salt: password),
+            patch("bcrypt.checkpw", lambda password, hashed: password == hashed),
+            # lifespan створює таблиці в тестовій базі і не надсилає листів
+            patch("main.engine", cls.engine),
+            patch("mail_queue.send_verification_batch", return_value=[]),
+        ]
+        for active_patch in cls._patches:
+            active_patch.start()
+
+        # Вхід у клієнт запускає lifespan один раз для всього класу
+        cls._client_cm = TestClient(app)
+        cls.client = cls._client_cm.__enter__()
+        cls._auth_headers = None
+        # Користувач створюється до будь-якої тестової транзакції, тому переживає rollback
+        cls._get_auth_headers()
+
+    @classmethod
+    def _get_auth_headers(cls):
+        """Реєструємо, підтверджуємо і логінимо спільного користувача один раз на клас."""
+        if cls._auth_headers is None:
+            email, password = "owner@example.com", "password"
+            register_response = cls.client.post("/register", json={"email": email, "password": password})
+            cls._user_id = register_response.json()["id"]
+            cls.client.get("/verify-email", params={"token": create_access_token({"sub": email})})
+            login_response = cls.client.post("/login", data={"username": email, "password": password})
+            access_token = login_response.json()["access_token"]
+            cls._auth_headers = {"Authorization": f"Bearer {access_token}"}
+        return cls._auth_headers
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._client_cm.__exit__(None, None, None)
+        # Закриття єдиного з'єднання знищує in-memory базу, DROP не потрібен
+        asyncio.run(cls.engine.dispose())
+        for active_patch in cls._patches:
+            active_patch.stop()
+        if cls._previous_get_db is not None:
+            app.dependency_overrides[get_db] = cls._previous_get_db
+        else:
+            app.dependency_overrides.pop(get_db, None)
+
     def setUp(self):
-        self.client = TestClient(app)
+        limiter.reset()
+        # Кеш відповідей типово вимкнений; кожен тест отримує свій, бо відкочені записи його не інвалідують
+        self._cache_patch = patch("response_cache._cache", MemoryCache(RESPONSE_CACHE_SIZE))
+        self._cache_patch.start()
+        # Заголовки будуються один раз на тест і перевикористовуються всіма запитами
+        self._headers = {**self._get_auth_headers(), **JSON_HEADERS}
+
+        # Кожен тест працює в зовнішній транзакції, яка відкочується в tearDown
+        self.connection, self.transaction = asyncio.run(self._begin())
+
+        async def override_get_db():
+            db = AsyncSession(bind=self.connection,
+                              join_transaction_mode="create_savepoint",
+                              expire_on_commit=False)
+            try:
+                yield db
+            finally:
+                await db.close()
 
-        # Налаштовуємо тестову базу
-        self.SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-        self.engine = create_engine(self.SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-        SessionLocal.configure(bind=self.engine)
+        self._override_get_db = override_get_db
+        app.dependency_overrides[get_db] = override_get_db
 
-        Base.metadata.create_all(bind=self.engine)
+    async def _begin(self):
+        connection = await self.engine.connect()
+        return connection, await connection.begin()
+
+    async def _rollback(self):
+        await self.transaction.rollback()
+        await self.connection.close()
 
     def tearDown(self):
-        with self.engine.begin() as conn:
-            conn.execute("DROP TABLE IF EXISTS user, contact")
-        self.engine.dispose()
+        app.dependency_overrides[get_db] = self._class_get_db
+        asyncio.run(self._rollback())
+        self._cache_patch.stop()
+
+    def _authed_get(self, url):
+        """GET від імені спільного користувача."""
+        return self.client.get(url, headers=self._headers)
+
+    def _authed_post(self, url, content):
+        """POST заздалегідь серіалізованого JSON від імені спільного користувача."""
+        return self.client.post(url, content=content, headers=self._headers)
+
+    def _authed_put(self, url, content):
+        """PUT заздалегідь серіалізованого JSON від імені спільного користувача."""
+        return self.client.put(url, content=content, headers=self._headers)
+
+    def _execute(self, stmt):
+        """Виконуємо запит у тестовій транзакції повз API і його кеш."""
+        return asyncio.run(self.connection.execute(stmt))
+
+    @classmethod
+    def _seed_contacts(cls, rows):
+        """Вставляємо і комітимо контакти спільного користувача одним запитом."""
+        asyncio.run(cls._insert_contacts(rows))
 
+    @classmethod
+    async def _insert_contacts(cls, rows):
+        async with AsyncSession(bind=cls.engine) as db:
+            await db.execute(insert(Contact), [{**row, "user_id": cls._user_id} for row in rows])
+            await db.commit()
+
+
+class TestAPI(APITestCase):
     def test_register_user(self):
-        response = self.client.post("/register", json={"email": "test@example.com", "password": "password"})
+        response = self.client.post("/register", content=_REGISTER_TEST_USER, headers=JSON_HEADERS)
         self.assertEqual(response.status_code, 201)
-        self.assertIn("email", response.json())
-        self.assertEqual(response.json()["email"], "test@example.com")
+        data = response.json()
+        self.assertIn("email", data)
+        self.assertEqual(data["email"], "test@example.com")
 
     def test_create_contact(self):
-        self.client.post("/register", json={"email": "test@example.com", "password": "password"})
-        
-        login_response = self.client.post("/login", data={"username": "test@example.com", "password": "password"})
-        access_token = login_response.json()["access_token"]
-
-        contact_data = {
-            "first_name": "John",
-            "last_name": "Doe",
-            "email": "johndoe@example.com",
-            "birthday": "1990-01-01"
-        }
-        
-        response = self.client.post(
-            "/contacts/",
-            json=contact_data,
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
+        response = self._authed_post("/contacts/", _CONTACT_JOHN)
         
         self.assertEqual(response.status_code, 200)
-        self.assertIn("email", response.json())
-        self.assertEqual(response.json()["email"], "johndoe@example.com")
+        data = response.json()
+        self.assertIn("email", data)
+        self.assertEqual(data["email"], "johndoe@example.com")
+
+    def test_create_contact_with_duplicate_email(self):
+        self._authed_post("/contacts/", _CONTACT_JOHN)
+
+        response = self._authed_post("/contacts/", _CONTACT_JOHNNY)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "Contact with this email already exists")
+        self.assertEqual(len(self._authed_get("/contacts/").json()), 1)
+
+    def test_create_contact_invalidates_cached_list(self):
+        self.assertEqual(self._authed_get("/contacts/").json(), [])
+
+        self._authed_post("/contacts/", _CONTACT_JOHN)
+
+        data = self._authed_get("/contacts/").json()
+        self.assertEqual([contact["email"] for contact in data], ["johndoe@example.com"])
+
+    def test_update_contact_invalidates_cached_responses(self):
+        contact_id = self._authed_post("/contacts/", _CONTACT_JOHN).json()["id"]
+        self._authed_get(f"/contacts/{contact_id}")
+        self._authed_get("/contacts/")
+
+        self._authed_put(f"/contacts/{contact_id}", _CONTACT_JOHNNY)
+
+        self.assertEqual(self._authed_get(f"/contacts/{contact_id}").json()["first_name"], "Johnny")
+        self.assertEqual(self._authed_get("/contacts/").json()[0]["first_name"], "Johnny")
+
+    def test_delete_contact_invalidates_cached_responses(self):
+        contact_id = self._authed_post("/contacts/", _CONTACT_JOHN).json()["id"]
+        self._authed_get(f"/contacts/{contact_id}")
+        self._authed_get("/contacts/")
+
+        self.client.delete(f"/contacts/{contact_id}")
+
+        self.assertEqual(self._authed_get(f"/contacts/{contact_id}").status_code, 404)
+        self.assertEqual(self._authed_get("/contacts/").json(), [])
+
+    def test_update_contact_of_another_user_is_not_found(self):
+        contact_id = self._authed_post("/contacts/", _CONTACT_JOHN).json()["id"]
+        self._execute(insert(User).values(email="other@example.com", hashed_password="password",
+                                          is_verified=True))
+        other_headers = {"Authorization": f"Bearer {create_access_token({'sub': 'other@example.com'})}",
+                         **JSON_HEADERS}
+
+        response = self.client.put(f"/contacts/{contact_id}", content=_CONTACT_JOHNNY,
+                                   headers=other_headers)
+
+        self.assertEqual(response.status_code, 404)
+        first_name = self._execute(select(Contact.first_name).where(Contact.id == contact_id))
+        self.assertEqual(first_name.scalar_one(), "John")
+
+    def test_update_contact_keeps_fields_sent_as_null(self):
+        contact = {**json.loads(_CONTACT_JOHN), "additional_data": "Колега"}
+        contact_id = self._authed_post("/contacts/", json.dumps(contact).encode()).json()["id"]
+
+        response = self._authed_put(f"/contacts/{contact_id}",
+                                    json.dumps({**contact, "additional_data": None}).encode())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["additional_data"], "Колега")
+
+    def test_read_contact_is_cached(self):
+        contact_id = self._authed_post("/contacts/", _CONTACT_JOHN).json()["id"]
+        self._authed_get(f"/contacts/{contact_id}")
+
+        # Зміна повз API не інвалідує кеш, тож відповідь приходить з кешу
+        self._execute(update(Contact).where(Contact.id == contact_id).values(first_name="Changed"))
+
+        self.assertEqual(self._authed_get(f"/contacts/{contact_id}").json()["first_name"], "John")
+
+    def test_read_contact_does_not_cache_responses_raced_by_a_write(self):
+        contact_id = self._authed_post("/contacts/", _CONTACT_JOHN).json()["id"]
+        store = response_cache.set_cached
+
+        async def store_after_concurrent_update(namespace, *args, **kwargs):
+            # Оновлення комітиться між читанням з бази і записом у кеш
+            await response_cache.invalidate(namespace)
+            await store(namespace, *args, **kwargs)
+
+        with patch("main.set_cached", store_after_concurrent_update):
+            self._authed_get(f"/contacts/{contact_id}")
+        self._execute(update(Contact).where(Contact.id == contact_id).values(first_name="Changed"))
+
+        self.assertEqual(self._authed_get(f"/contacts/{contact_id}").json()["first_name"], "Changed")
+
+    def test_upcoming_birthdays_are_cached_until_a_contact_changes(self):
+        # 2000 рік високосний, тож 29 лютого теж підходить
+        tomorrow = date.today() + timedelta(days=1)
+        birthday = date(2000, tomorrow.month, tomorrow.day)
+        self._execute(insert(Contact).values(
+            first_name="Ann", last_name="Lee", email="ann@example.com", phone_number="1",
+            birthday=birthday, user_id=self._user_id))
+        self.assertEqual(len(self._authed_get("/contacts/birthdays/").json()), 1)
+
+        self._execute(insert(Contact).values(
+            first_name="Bob", last_name="Lee", email="bob@example.com", phone_number="2",
+            birthday=birthday, user_id=self._user_id))
+        self.assertEqual(len(self._authed_get("/contacts/birthdays/").json()), 1)
+
+        self._authed_post("/contacts/", json.dumps({
+            "first_name": "Cid", "last_name": "Lee", "email": "cid@example.com",
+            "phone_number": "3", "birthday": birthday.isoformat()}).encode())
+        self.assertEqual(len(self._authed_get("/contacts/birthdays/").json()), 3)
+
+    def test_upcoming_birthdays_cross_new_year(self):
+        for name, birthday in (("Dec", date(1990, 12, 30)), ("Jan", date(1991, 1, 3)),
+                               ("Late", date(1992, 1, 5))):
+            self._execute(insert(Contact).values(
+                first_name=name, last_name="Lee", email=f"{name}@example.com", phone_number="1",
+                birthday=birthday, user_id=self._user_id))
+
+        # Вікно 28.12–04.01 розбивається на два діапазони
+        with patch("main.datetime") as mock_datetime:
+            mock_datetime.today.return_value = datetime(2026, 12, 28)
+            response = self._authed_get("/contacts/birthdays/")
+
+        self.assertEqual(sorted(c["first_name"] for c in response.json()), ["Dec", "Jan"])
+
+    def _exhaust_rate_limit(self, endpoint, key, path):
+        """Вичерпуємо ліміт напряму в сховищі замість п'яти справжніх запитів."""
+        limits = limiter._route_limits.get(endpoint) or [
+            limit for group in limiter._default_limits for limit in group]
+        for limit in limits:
+            limiter.limiter.hit(limit.limit, key, limit.scope or path, cost=limit.limit.amount)
+
+    def test_rate_limit(self):
+        self._exhaust_rate_limit("main.create_contact", "user:owner@example.com", "/contacts/")
+
+        response = self._authed_post("/contacts/", _CONTACT_JOHN)
+        self.assertEqual(response.status_code, 429)
+
+    def test_rate_limit_counts_forged_tokens_under_client_address(self):
+        forged_token = jwt.encode({"sub": "owner@example.com", "exp": int(time.time()) + 60},
+                                  "not-the-secret", algorithm="HS256")
+        forged_headers = {"Authorization": f"Bearer {forged_token}", **JSON_HEADERS}
+        self._exhaust_rate_limit("main.read_contacts", "testclient", "/contacts/")
+
+        forged_response = self.client.get("/contacts/", headers=forged_headers)
+        # Підроблений токен не витрачає ліміт справжнього власника sub
+        response = self._authed_get("/contacts/")
+
+        self.assertEqual(forged_response.status_code, 429)
+        self.assertEqual(response.status_code, 200)
+
+    def test_login_rate_limit_is_per_client_address(self):
+        self._exhaust_rate_limit("main.login", "testclient", "/login")
+
+        # Навіть дійсний токен не дає обійти ліміт входу
+        response = self.client.post("/login", headers=self._get_auth_headers(),
+                                    data={"username": "owner@example.com", "password": "password"})
+
+        self.assertEqual(response.status_code, 429)
+
+    def test_rate_limit_concurrent(self):
+        bodies = [
+            json.dumps({"first_name": "John", "last_name": "Doe", "email": f"johndoe{i}@example.com",
+                        "phone_number": "1234567890", "birthday": "1990-01-01"}).encode()
+            for i in range(6)
+        ]
+
+        # Усі запити ділять одне з'єднання тестової транзакції, тому сесії видаються по черзі
+        db_lock = asyncio.Lock()
+        session_override = self._override_get_db
+
+        async def locked_get_db():
+            async with db_lock:
+                sessions = session_override()
+                try:
+                    yield await anext(sessions)
+                finally:
+                    # Закриваємо всередині блокування, навіть якщо запит упав
+                    await sessions.aclose()
+
+        app.dependency_overrides[get_db] = locked_get_db
+
+        async def post_all():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(
+                    *[client.post("/contacts/", content=body, headers=self._headers) for body in bodies]
+                )
+
+        responses = asyncio.run(post_all())
+        statuses = sorted(response.status_code for response in responses)
+        self.assertEqual(statuses, [200] * 5 + [429])
+
+
+class TestContactQueries(APITestCase):
+    """Тести лише на читання зі спільним набором контактів для всього класу."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._seed_contacts(SEED_CONTACTS)
 
     def test_read_contacts(self):
-        self.client.post("/register", json={"email": "test@example.com", "password": "password"})
-        
-        login_response = self.client.post("/login", data={"username": "test@example.com", "password": "password"})
-        access_token = login_response.json()["access_token"]
-
-        self.client.post(
-            "/contacts/",
-            json={"first_name": "John", "last_name": "Doe", "email": "johndoe@example.com", "birthday": "1990-01-01"},
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        self.client.post(
-            "/contacts/",
-            json={"first_name": "Jane", "last_name": "Doe", "email": "janedoe@example.com", "birthday": "1992-02-02"},
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-
-        response = self.client.get("/contacts/", headers={"Authorization": f"Bearer {access_token}"})
+        response = self._authed_get("/contacts/")
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 2)
+        data = response.json()
+        self.assertEqual(len(data), 2)
+
+    def test_read_contacts_returns_only_own_contacts(self):
+        other_user = self._execute(insert(User).values(email="other@example.com",
+                                                       hashed_password="password"))
+        self._execute(insert(Contact).values(
+            first_name="Ann", last_name="Lee", email="ann@example.com", phone_number="1",
+            birthday=date(1990, 3, 3), user_id=other_user.inserted_primary_key[0]))
+
+        data = self._authed_get("/contacts/").json()
+
+        self.assertEqual([c["email"] for c in data], ["johndoe@example.com", "janedoe@example.com"])
+
+    def test_read_contacts_clamps_pagination(self):
+        with patch("main.MAX_PAGE_SIZE", 1):
+            self.assertEqual(len(self._authed_get("/contacts/?limit=100").json()), 1)
+        self.assertEqual(len(self._authed_get("/contacts/?limit=0").json()), 1)
+        # Від'ємний skip рахується як 0
+        self.assertEqual(len(self._authed_get("/contacts/?skip=-5").json()), 2)
+
+    def test_read_contacts_after_id(self):
+        first_id = self._authed_get("/contacts/").json()[0]["id"]
+        self._execute(insert(Contact).values(
+            first_name="Ann", last_name="Doe", email="ann@example.com", phone_number="1",
+            birthday=date(1990, 3, 3), user_id=self._user_id))
+
+        data = self._authed_get(f"/contacts/?after_id={first_id}").json()
+        # skip ігнорується разом з after_id
+        data_with_skip = self._authed_get(f"/contacts/?after_id={first_id}&skip=1").json()
+
+        ids = [c["id"] for c in data]
+        self.assertEqual(ids, sorted(ids))
+        self.assertTrue(all(contact_id > first_id for contact_id in ids))
+        self.assertEqual([c["email"] for c in data], ["janedoe@example.com", "ann@example.com"])
+        self.assertEqual(data_with_skip, data)
 
     def test_search_contacts(self):
-        self.client.post("/register", json={"email": "test@example.com", "password": "password"})
-        
-        login_response = self.client.post("/login", data={"username": "test@example.com", "password": "password"})
-        access_token = login_response.json()["access_token"]
-
-        self.client.post(
-            "/contacts/",
-            json={"first_name": "John", "last_name": "Doe", "email": "johndoe@example.com", "birthday": "1990-01-01"},
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        self.client.post(
-            "/contacts/",
-            json={"first_name": "Jane", "last_name": "Doe", "email": "janedoe@example.com", "birthday": "1992-02-02"},
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-
-        response = self.client.get("/contacts/search/?query=johndoe@example.com", headers={"Authorization": f"Bearer {access_token}"})
+        response = self._authed_get("/contacts/search/?query=johndoe@example.com")
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 1)
-        self.assertEqual(response.json()[0]["email"], "johndoe@example.com")
+        data = response.json()
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]["email"], "johndoe@example.com")
 
-    def test_rate_limit(self):
-        self.client.post("/register", json={"email": "test@example.com", "password": "password"})
-        
-        login_response = self.client.post("/login", data={"username": "test@example.com", "password": "password"})
-        access_token = login_response.json()["access_token"]
-
-        for _ in range(6):
-            response = self.client.post(
-                "/contacts/",
-                json={"first_name": "John", "last_name": "Doe", "email": f"johndoe{_}@example.com", "birthday": "1990-01-01"},
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
-        self.assertEqual(response.status_code, 429)
 
 if __name__ == "__main__":
     unittest.main()
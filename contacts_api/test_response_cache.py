@@ -0,0 +1,145 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from redis.exceptions import ConnectionError as RedisConnectionError
+from response_cache import MemoryCache, RedisCache, create_cache, get_cached, invalidate, set_cached
+
+
+class TestMemoryCache(unittest.TestCase):
+    def setUp(self):
+        """Set up a cache with a clock the tests can move."""
+        self.now = 1000.0
+        self.cache = MemoryCache(maxsize=2, timer=lambda: self.now)
+
+    def _get(self, namespace, key):
+        return asyncio.run(self.cache.get(namespace, key))[0]
+
+    def _set(self, namespace, key, body, ttl=30):
+        version = asyncio.run(self.cache.get(namespace, key))[1]
+        asyncio.run(self.cache.set(namespace, key, body, ttl, version))
+
+    def test_get_returns_stored_response(self):
+        """Test if a stored response is returned for the same namespace and key."""
+        self._set("contacts:1", ("skip", 0, 100), b"[]")
+        self.assertEqual(self._get("contacts:1", ("skip", 0, 100)), b"[]")
+        self.assertIsNone(self._get("contacts:1", ("skip", 100, 100)))
+        self.assertIsNone(self._get("contacts:2", ("skip", 0, 100)))
+
+    def test_delete_drops_only_given_namespace(self):
+        """Test if invalidating a namespace leaves other namespaces cached."""
+        self._set("contacts:1", None, b"[1]")
+        self._set("contacts:2", None, b"[2]")
+        asyncio.run(self.cache.delete("contacts:1"))
+        self.assertIsNone(self._get("contacts:1", None))
+        self.assertEqual(self._get("contacts:2", None), b"[2]")
+
+    def test_namespace_expires_after_its_ttl(self):
+        """Test if each namespace expires after its own TTL."""
+        self._set("birthdays", "today", b"[1]", ttl=3600)
+        self._set("contacts:1", None, b"[2]")
+        self.now += 31
+        self.assertEqual(self._get("birthdays", "today"), b"[1]")
+        self.assertIsNone(self._get("contacts:1", None))
+
+    def test_lookups_do_not_grow_the_cache(self):
+        """Test if misses leave no state behind and the namespace count is bounded."""
+        for contact_id in range(100):
+            self._get(f"contact:{contact_id}", None)
+        self.assertEqual(len(self.cache._namespaces), 0)
+        for contact_id in range(3):
+            self._set(f"contact:{contact_id}", None, b"{}")
+        self.assertEqual(len(self.cache._namespaces), 2)
+
+    def test_store_after_invalidation_is_dropped(self):
+        """Test if a response read before an invalidation is not stored after it."""
+        body, version = asyncio.run(self.cache.get("contacts:1", None))
+        asyncio.run(self.cache.delete("contacts:1"))
+        asyncio.run(self.cache.set("contacts:1", None, b"[stale]", 30, version))
+
+        self.assertIsNone(self._get("contacts:1", None))
+        self._set("contacts:1", None, b"[fresh]")
+        self.assertEqual(self._get("contacts:1", None), b"[fresh]")
+
+    def test_evicted_versions_still_block_stale_stores(self):
+        """Test if a namespace whose version was evicted still rejects older versions."""
+        version = asyncio.run(self.cache.get("contacts:1", None))[1]
+        for namespace in ("contacts:1", "contacts:2", "contacts:3"):
+            asyncio.run(self.cache.delete(namespace))
+        asyncio.run(self.cache.set("contacts:1", None, b"[stale]", 30, version))
+
+        self.assertEqual(len(self.cache._versions), 2)
+        self.assertIsNone(self._get("contacts:1", None))
+
+
+class TestRedisCache(unittest.TestCase):
+    def setUp(self):
+        """Set up a cache around a mocked Redis client and pipeline."""
+        self.cache = RedisCache("redis://localhost:6379/1")
+        self.cache._redis = MagicMock()
+        self.pipe = MagicMock()
+        self.pipe.execute = AsyncMock(return_value=[b"3", b"[]"])
+        self.cache._redis.pipeline.return_value.__aenter__.return_value = self.pipe
+        self.cache._store_if_current = AsyncMock()
+
+    def test_namespaces_are_redis_hashes(self):
+        """Test if lookups read one hash and one version counter per namespace."""
+        body, version = asyncio.run(self.cache.get("contacts:1", ("skip", 0, 100)))
+
+        self.assertEqual((body, version), (b"[]", 3))
+        self.pipe.get.assert_called_once_with("response-cache-version:contacts:1")
+        self.pipe.hget.assert_called_once_with("response-cache:contacts:1", "('skip', 0, 100)")
+
+    def test_store_checks_the_version_in_redis(self):
+        """Test if the store goes through the check-and-set script with the read version."""
+        asyncio.run(self.cache.set("contacts:1", None, b"[]", 30, 3))
+
+        self.cache._store_if_current.assert_awaited_once_with(
+            keys=["response-cache:contacts:1", "response-cache-version:contacts:1"],
+            args=["None", b"[]", 30, 3])
+
+    def test_delete_bumps_versions_before_dropping_hashes(self):
+        """Test if invalidation increments the versions ahead of deleting the hashes."""
+        asyncio.run(self.cache.delete("contacts:1", "birthdays"))
+
+        calls = [call[0] for call in self.pipe.method_calls if call[0] != "execute"]
+        self.assertEqual(calls, ["incr", "expire", "incr", "expire", "delete"])
+        self.pipe.delete.assert_called_once_with("response-cache:contacts:1",
+                                                 "response-cache:birthdays")
+
+    def test_redis_errors_are_cache_misses(self):
+        """Test if an unreachable Redis makes lookups miss without allowing a store."""
+        self.pipe.execute.side_effect = RedisConnectionError()
+        with self.assertLogs("response_cache", level="WARNING"):
+            self.assertEqual(asyncio.run(self.cache.get("contacts:1", None)), (None, -1))
+
+
+class TestResponseCacheModule(unittest.TestCase):
+    def test_cache_is_disabled_without_url(self):
+        """Test if an empty RESPONSE_CACHE_URL turns caching off."""
+        self.assertIsNone(create_cache(""))
+        self.assertIsInstance(create_cache("memory://"), MemoryCache)
+        self.assertIsInstance(create_cache("redis://redis:6379/1"), RedisCache)
+
+        async def store_and_read():
+            await set_cached("contacts:1", None, b"[]", 0)
+            await invalidate("contacts:2")
+            return await get_cached("contacts:1", None)
+
+        with patch("response_cache._cache", None):
+            self.assertEqual(asyncio.run(store_and_read()), (None, 0))
+
+    def test_invalidate_between_read_and_store(self):
+        """Test if a write committed during a cache miss keeps the stale response out."""
+        async def read_during_write():
+            body, version = await get_cached("contact:1", None)
+            # A concurrent write commits while the reader is still building its response
+            await invalidate("contact:1")
+            await set_cached("contact:1", None, b"{\"first_name\": \"John\"}", version)
+            return await get_cached("contact:1", None)
+
+        with patch("response_cache._cache", MemoryCache(maxsize=10)):
+            self.assertIsNone(asyncio.run(read_during_write())[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
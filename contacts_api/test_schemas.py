@@ -0,0 +1,26 @@
+import unittest
+from pydantic import ValidationError
+from schemas import ContactCreate, validate_contact_email
+
+
+class TestValidateContactEmail(unittest.TestCase):
+    def test_valid_email_gets_lowercase_domain(self):
+        """Test if a valid email is accepted with its domain lowercased."""
+        self.assertEqual(validate_contact_email("John.Doe@Example.COM"), "John.Doe@example.com")
+
+    def test_invalid_emails_are_rejected(self):
+        """Test if malformed emails, including a trailing newline, are rejected."""
+        for value in ("johndoe", "john@doe", "john doe@example.com", "john@@example.com",
+                      "johndoe@example.com\n", "\njohndoe@example.com"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                validate_contact_email(value)
+
+    def test_contact_create_reports_invalid_email(self):
+        """Test if ContactCreate turns a rejected email into a validation error."""
+        with self.assertRaises(ValidationError):
+            ContactCreate(first_name="John", last_name="Doe", email="johndoe@example.com\n",
+                          phone_number="1234567890", birthday="1990-01-01")
+
+
+if __name__ == "__main__":
+    unittest.main()
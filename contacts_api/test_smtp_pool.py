@@ -0,0 +1,59 @@
+import unittest
+import smtp_pool
+from unittest.mock import patch, MagicMock
+from smtplib import SMTPException
+from smtp_pool import get_smtp, close_all
+
+
+class TestSMTPPoolModule(unittest.TestCase):
+    def tearDown(self):
+        """Drop any connections left in the pool."""
+        with patch("smtp_pool._close"):
+            close_all()
+
+    @patch("smtp_pool._connect")
+    def test_get_smtp_reuses_connection(self, mock_connect):
+        """Test if a released connection is handed out again."""
+        server = MagicMock()
+        server.noop.return_value = (250, b"OK")
+        mock_connect.return_value = server
+
+        with get_smtp() as first:
+            pass
+        with get_smtp() as second:
+            pass
+
+        self.assertIs(first, second)
+        mock_connect.assert_called_once()
+        server.noop.assert_called_once()
+
+    @patch("smtp_pool._connect")
+    def test_get_smtp_replaces_dead_connection(self, mock_connect):
+        """Test if a connection failing the health check is replaced."""
+        dead, fresh = MagicMock(), MagicMock()
+        dead.noop.side_effect = SMTPException("gone")
+        mock_connect.side_effect = [dead, fresh]
+
+        with get_smtp():
+            pass
+        with get_smtp() as server:
+            self.assertIs(server, fresh)
+
+        dead.quit.assert_called_once()
+
+    @patch("smtp_pool._connect")
+    def test_get_smtp_closes_connection_on_error(self, mock_connect):
+        """Test if a connection is dropped when sending fails."""
+        server = MagicMock()
+        mock_connect.return_value = server
+
+        with self.assertRaises(SMTPException):
+            with get_smtp():
+                raise SMTPException("SMTP error")
+
+        server.quit.assert_called_once()
+        self.assertTrue(smtp_pool._pool.empty())
+
+
+if __name__ == "__main__":
+    unittest.main()